@@ -4,6 +4,7 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_booking.settings')
 django.setup()
 
+from django.db.models import Count
 from movies.models import Movie
 from datetime import date
 
@@ -197,6 +198,6 @@ Movie.objects.get_or_create(
 print('✅ Successfully added Bollywood movies across all genres!')
 print(f'📊 Total movies in database: {Movie.objects.count()}')
 print('\nMovies by genre:')
+counts = dict(Movie.objects.values_list('genre').annotate(count=Count('id')).order_by())
 for genre_code, genre_name in Movie.GENRE_CHOICES:
-    count = Movie.objects.filter(genre=genre_code).count()
-    print(f'  {genre_name}: {count} movies')
+    print(f'  {genre_name}: {counts.get(genre_code, 0)} movies')
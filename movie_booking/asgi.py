@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_booking.settings')
 
 application = get_asgi_application()
+
+# Optional in-process seat hold reaper (SEAT_HOLD_REAPER_INTERVAL)
+from movies.holds import start_reaper  # noqa: E402
+
+start_reaper()
+
+# Payment gateway workers, re-queueing anything a previous process left unsettled
+from movies.payments import start_payment_worker  # noqa: E402
+
+start_payment_worker()
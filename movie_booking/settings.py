@@ -37,11 +37,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'movies.middleware.WhiteNoiseMiddleware',
+    'movies.instrumentation.PerformanceMiddleware',
+    'movies.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'movies.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -50,7 +52,8 @@ ROOT_URLCONF = 'movie_booking.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to PerformanceMiddleware
+        'BACKEND': 'movies.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,6 +68,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'movie_booking.wsgi.application'
+ASGI_APPLICATION = 'movie_booking.asgi.application'
+
+# Serve home, movie_detail, shows_list and my_bookings from async views.
+# Only worth it under ASGI (uvicorn workers); see README.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
 
 
 # Database
@@ -73,7 +81,7 @@ WSGI_APPLICATION = 'movie_booking.wsgi.application'
 DATABASE_URL = config('DATABASE_URL', default=None)
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, conn_health_checks=True)
     }
 else:
     DATABASES = {
@@ -83,6 +91,109 @@ else:
         }
     }
 
+# Read replicas for the catalogue pages (see movies.routers), comma separated.
+# Browsers read from the primary for REPLICA_PIN_SECONDS after a POST.
+DATABASE_REPLICA_URLS = [url for url in config('DATABASE_REPLICA_URLS', default='').split(',') if url]
+DATABASE_REPLICAS = []
+for index, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica{index}'] = dict(dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True),
+                                        TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['movies.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# How PostgreSQL connections are managed (see README "Connection pooling"):
+# persistent (one health-checked connection per thread, CONN_MAX_AGE), pool
+# (threads share a bounded per-process pool, movies.db) or pgbouncer (a
+# transaction-pooling PgBouncer at DATABASE_URL).
+DATABASE_POOL_MODE = config('DATABASE_POOL_MODE', default='persistent')
+for database in DATABASES.values():
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    if DATABASE_POOL_MODE == 'pool':
+        database.update(
+            ENGINE='movies.db',
+            # Each request hands its connection back to the pool
+            CONN_MAX_AGE=0,
+            POOL_MAX_SIZE=config('DATABASE_POOL_SIZE', default=10, cast=int),
+            POOL_TIMEOUT=config('DATABASE_POOL_TIMEOUT', default=10, cast=float),
+            POOL_MAX_AGE=600,
+        )
+    elif DATABASE_POOL_MODE == 'pgbouncer':
+        # Consecutive transactions may run on different server connections
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Cache
+# CACHE_BACKEND is one of locmem, file or redis (REDIS_URL, e.g. a local
+# redis-server for development).
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'moviemate',
+        }
+    }
+
+# Sessions
+# SESSION_MODE is db, cached_db (read through the cache, written to the
+# database) or signed_cookies (no server-side storage). Sessions are only
+# written when something in them changes.
+SESSION_MODE = config('SESSION_MODE', default='cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Seconds a logged-in user is served from the cache (0 disables). Off by
+# default with locmem: each worker has its own copy, and a save only drops
+# the one in the worker that made it.
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=0 if CACHE_BACKEND == 'locmem' else 300, cast=int)
+
+# Seconds a rendered catalogue page is kept; edits invalidate it immediately
+CATALOGUE_CACHE_TIMEOUT = config('CATALOGUE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Upper bound on how stale a movie's cached showtimes grid can get
+SHOWTIMES_CACHE_TIMEOUT = config('SHOWTIMES_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Per-view query budgets checked by PerformanceMiddleware. Set
+# QUERY_BUDGET_ENFORCE=True (as tests should) to turn overruns into errors.
+# Budgets include the session and user lookups of a logged-in request.
+QUERY_BUDGETS = {
+    'movies:home': 3,
+    'movies:movie_detail': 4,
+    'movies:shows_list': 5,
+    'movies:booking': 7,
+    'movies:payment': 7,
+    'movies:cart': 4,
+    'movies:checkout': 9,
+    'movies:order_payment': 7,
+    'movies:booking_confirmation': 4,
+    'movies:my_bookings': 4,
+    'movies:sales_report': 5,
+}
+QUERY_BUDGET_ENFORCE = config('QUERY_BUDGET_ENFORCE', default=False, cast=bool)
+VIEW_STATS_WINDOW = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -124,8 +235,18 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# WhiteNoise configuration for serving static files in production
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise serves the collectstatic build: fingerprinted, gzip/brotli
+# precompressed and cached forever. The build also bundles and minifies
+# the CSS below and shrinks images (plus a WebP copy) to the given widths.
+STATICFILES_STORAGE = 'movies.storage.BuildStaticFilesStorage'
+STATIC_BUNDLES = {
+    'css/site.min.css': ['css/style.css'],
+}
+STATIC_IMAGE_WIDTHS = {
+    'images': 600,
+    # About page avatars render at 150px; 2x for high-DPI screens
+    'developers_image': 300,
+}
 
 # Media files
 MEDIA_URL = '/media/'
@@ -140,3 +261,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'movies:login'
 LOGIN_REDIRECT_URL = 'movies:home'
 LOGOUT_REDIRECT_URL = 'movies:home'
+
+# Seat holds
+# Unpaid bookings give their seats back after SEAT_HOLD_MINUTES. Set
+# SEAT_HOLD_REAPER_INTERVAL (seconds) to run the reaper in-process instead
+# of scheduling `python manage.py expire_holds`.
+SEAT_HOLD_MINUTES = config('SEAT_HOLD_MINUTES', default=10, cast=int)
+SEAT_HOLD_REAPER_INTERVAL = config('SEAT_HOLD_REAPER_INTERVAL', default=0, cast=int)
+
+# Scheduling
+# A theater is busy for a movie's duration plus SHOW_TURNAROUND_MINUTES
+# (cleaning, ads); shows in one theater may not overlap. See movies.scheduling
+SHOW_TURNAROUND_MINUTES = config('SHOW_TURNAROUND_MINUTES', default=15, cast=int)
+
+# Payments
+# Charges run on PAYMENT_WORKERS background threads and are settled in
+# batches of up to PAYMENT_SETTLE_BATCH, waiting at most
+# PAYMENT_SETTLE_INTERVAL seconds to fill one. PAYMENT_WORKERS=0 charges
+# inline after the request commits. Attempts left PROCESSING for two sweeps
+# PAYMENT_REQUEUE_INTERVAL seconds apart are charged (idempotently) again.
+PAYMENT_GATEWAY = config('PAYMENT_GATEWAY', default='movies.payments.FakeGateway')
+PAYMENT_GATEWAY_OPTIONS = {
+    'latency': config('FAKE_GATEWAY_LATENCY', default=0.2, cast=float),
+    'failure_rate': config('FAKE_GATEWAY_FAILURE_RATE', default=0.1, cast=float),
+}
+PAYMENT_WORKERS = config('PAYMENT_WORKERS', default=4, cast=int)
+PAYMENT_SETTLE_BATCH = config('PAYMENT_SETTLE_BATCH', default=100, cast=int)
+PAYMENT_SETTLE_INTERVAL = config('PAYMENT_SETTLE_INTERVAL', default=0.05, cast=float)
+PAYMENT_REQUEUE_INTERVAL = config('PAYMENT_REQUEUE_INTERVAL', default=60, cast=int)
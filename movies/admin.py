@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie, Theater, Show, Booking
+from .models import Movie, Theater, Show, Booking, Order, DailySales
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
@@ -18,8 +18,42 @@ class ShowAdmin(admin.ModelAdmin):
     list_filter = ['show_date', 'theater']
     search_fields = ['movie__title', 'theater__name']
 
+    def get_readonly_fields(self, request, obj=None):
+        # Once on sale the count follows the seat map, see movies.seatmap
+        return ['available_seats'] if obj else []
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Leave the seat map and count to concurrent bookings; a new
+            # price also resets the repricer's base (see movies.signals)
+            update_fields = [*form.changed_data, 'runtime']
+            if 'price' in update_fields:
+                update_fields.append('base_price')
+            obj.save(update_fields=update_fields)
+        else:
+            obj.save()
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ['user', 'show', 'seats_booked', 'booking_date', 'total_price', 'payment_status', 'payment_method']
+    list_display = ['user', 'show', 'seats_booked', 'booking_date', 'total_price', 'payment_status', 'payment_method', 'hold_expires_at']
     list_filter = ['booking_date', 'payment_status', 'payment_method']
     search_fields = ['user__username', 'show__movie__title', 'payment_id']
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'created_at', 'total_price', 'payment_status', 'payment_method']
+    list_filter = ['created_at', 'payment_status', 'payment_method']
+    search_fields = ['user__username', 'payment_id']
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ['date', 'movie', 'theater', 'show', 'payment_method', 'bookings', 'seats_sold', 'revenue']
+    list_filter = ['date', 'payment_method']
+    list_select_related = ['movie', 'theater', 'show']
+    
+    # Written by the payment settler and rebuild_sales only
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
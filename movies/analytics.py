@@ -0,0 +1,125 @@
+"""
+Sales analytics from the DailySales rollup.
+
+Each settled payment batch adds its bookings to DailySales (one row per
+show and payment method) with F() increments, so reports never touch the
+booking table. Every show also has a row with a blank payment method that
+carries its seats offered (``record_offers``, kept current as shows and
+theaters are saved), so occupancy never touches the show table either.
+``rebuild_sales`` recomputes the rollup from bookings for backfills or
+after manual edits (``python manage.py rebuild_sales``).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Booking, DailySales, Show
+
+
+def _sales(bookings):
+    """Completed ``bookings`` summed per show and payment method"""
+    rows = bookings.values(
+        'show_id', 'show__movie_id', 'show__theater_id', 'show__show_date', 'payment_method',
+    ).annotate(bookings_count=Count('id'), seats=Sum('seats_booked'), amount=Sum('total_price')).order_by()
+    for row in rows.iterator():
+        yield {
+            'show_id': row['show_id'], 'movie_id': row['show__movie_id'], 'theater_id': row['show__theater_id'],
+            'date': row['show__show_date'], 'payment_method': row['payment_method'] or '',
+            'bookings_count': row['bookings_count'], 'seats': row['seats'], 'amount': row['amount'],
+        }
+
+
+def _add(row):
+    key = {'show_id': row['show_id'], 'payment_method': row['payment_method']}
+    increments = {
+        'bookings': F('bookings') + row['bookings_count'],
+        'seats_sold': F('seats_sold') + row['seats'],
+        'revenue': F('revenue') + row['amount'],
+    }
+    if DailySales.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            DailySales.objects.create(
+                **key, movie_id=row['movie_id'], theater_id=row['theater_id'], date=row['date'],
+                bookings=row['bookings_count'], seats_sold=row['seats'], revenue=row['amount'],
+            )
+    except IntegrityError:
+        # Another process created the row first
+        DailySales.objects.filter(**key).update(**increments)
+
+
+def record_offers(shows):
+    """
+    Write the seats offered by ``shows`` (a Show queryset) to their offer
+    rows, creating the rows if missing
+    """
+    rows = [
+        DailySales(show_id=show_id, movie_id=movie_id, theater_id=theater_id, date=show_date,
+                   payment_method='', seats_offered=capacity)
+        for show_id, movie_id, theater_id, show_date, capacity in shows.values_list(
+            'id', 'movie_id', 'theater_id', 'show_date', 'theater__capacity').iterator()
+    ]
+    DailySales.objects.bulk_create(rows, batch_size=1000, update_conflicts=True,
+                                   unique_fields=['show', 'payment_method'], update_fields=['seats_offered'])
+
+
+def record_sales(booking_ids):
+    """Add newly completed bookings to the rollup; call in the same transaction"""
+    if booking_ids:
+        for row in _sales(Booking.objects.filter(id__in=booking_ids, payment_status='COMPLETED')):
+            _add(row)
+
+
+@transaction.atomic
+def rebuild_sales(start=None, end=None, batch_size=1000):
+    """
+    Recompute the rollup from bookings for show dates in ``[start, end]``
+    (all of them by default) and return the number of rows written.
+    """
+    bookings = Booking.objects.filter(payment_status='COMPLETED')
+    shows = Show.objects.all()
+    rollup = DailySales.objects.all()
+    if start:
+        bookings = bookings.filter(show__show_date__gte=start)
+        shows = shows.filter(show_date__gte=start)
+        rollup = rollup.filter(date__gte=start)
+    if end:
+        bookings = bookings.filter(show__show_date__lte=end)
+        shows = shows.filter(show_date__lte=end)
+        rollup = rollup.filter(date__lte=end)
+
+    rollup.delete()
+    rows = [
+        DailySales(show_id=row['show_id'], movie_id=row['movie_id'], theater_id=row['theater_id'],
+                   date=row['date'], payment_method=row['payment_method'],
+                   bookings=row['bookings_count'], seats_sold=row['seats'], revenue=row['amount'])
+        for row in _sales(bookings)
+    ]
+    DailySales.objects.bulk_create(rows, batch_size=batch_size)
+    record_offers(shows)
+    return len(rows)
+
+
+def revenue_by_movie(start, end):
+    """Seats and revenue per show date and movie"""
+    return DailySales.objects.filter(date__range=(start, end), bookings__gt=0).values('date', 'movie__title').annotate(
+        seats=Sum('seats_sold'), revenue=Sum('revenue'),
+    ).order_by('-date', '-revenue')
+
+
+def occupancy_by_theater(start, end):
+    """Seats sold against seats offered per theater, from the rollup alone"""
+    theaters = DailySales.objects.filter(date__range=(start, end)).values('theater_id', 'theater__name').annotate(
+        shows=Count('id', filter=Q(payment_method='')), seats=Sum('seats_sold'), capacity=Sum('seats_offered'),
+    ).order_by('theater__name')
+    return [
+        dict(theater, occupancy=100 * theater['seats'] / theater['capacity'] if theater['capacity'] else 0)
+        for theater in theaters
+    ]
+
+
+def payment_mix(start, end):
+    """Bookings and revenue per payment method"""
+    return DailySales.objects.filter(date__range=(start, end), bookings__gt=0).values('payment_method').annotate(
+        bookings_count=Sum('bookings'), revenue=Sum('revenue'),
+    ).order_by('-revenue')
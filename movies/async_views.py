@@ -0,0 +1,118 @@
+"""
+Async versions of the read-only catalogue views.
+
+Used instead of their sync counterparts in movies.views when
+ASYNC_READ_VIEWS is on and the site runs under ASGI (see README), so one
+process can serve many slow readers. Bookings and payments stay on the
+transactional sync views.
+
+Everything a template touches is loaded before rendering, including the
+session-backed user and messages, so rendering never queries the
+database from the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.messages import get_messages
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+
+from . import cache as catalogue_cache
+from .models import Movie, Theater
+from .pagination import akeyset_paginate
+from .routers import replica_reads
+from .showtimes import get_showtimes
+from .views import (SHOWS_ORDERING, SHOWS_PAGE_SIZE, booking_sections, catalogue_movies, filter_query,
+                    upcoming_shows)
+
+
+def _prime_request(request):
+    """Load the user and pending messages; returns (user, has_messages)"""
+    user = request.user
+    user.is_authenticated
+    return user, bool(get_messages(request))
+
+
+@replica_reads
+async def home(request):
+    """
+    Dynamic home page displaying all active movies
+    """
+    search_query = request.GET.get('search', '')
+    genre_filter = request.GET.get('genre', '')
+    user, has_messages = await sync_to_async(_prime_request)(request)
+
+    cacheable = not user.is_authenticated and not has_messages
+    if cacheable:
+        cache_key = await sync_to_async(catalogue_cache.catalogue_key)('home', search_query, genre_filter)
+        content = await catalogue_cache.get_cache().aget(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+
+    # Full-text search runs raw SQL, so build the queryset off the event loop
+    movies = await sync_to_async(catalogue_movies)(search_query, genre_filter)
+    context = {
+        'movies': [movie async for movie in movies.aiterator()],
+        'search_query': search_query,
+        'genre_filter': genre_filter,
+        'genres': Movie.GENRE_CHOICES,
+    }
+    response = render(request, 'movies/home.html', context)
+    if cacheable:
+        await sync_to_async(catalogue_cache.set_page)(cache_key, response.content)
+    return response
+
+
+@replica_reads
+async def movie_detail(request, movie_id):
+    """
+    Movie detail page with available shows
+    """
+    await sync_to_async(_prime_request)(request)
+    try:
+        movie = await Movie.objects.aget(id=movie_id)
+    except Movie.DoesNotExist:
+        raise Http404('No Movie matches the given query.')
+    context = {
+        'movie': movie,
+        'showtimes': await sync_to_async(get_showtimes)(movie.id),
+    }
+    return render(request, 'movies/movie_detail.html', context)
+
+
+@replica_reads
+async def shows_list(request):
+    """
+    List upcoming shows, a page at a time
+    """
+    await sync_to_async(_prime_request)(request)
+    shows, filters = upcoming_shows(request.GET)
+    page = await akeyset_paginate(shows, SHOWS_ORDERING, request.GET.get('cursor'), SHOWS_PAGE_SIZE)
+    theaters = Theater.objects.only('id', 'name').order_by('name')
+    movies = Movie.objects.filter(is_active=True).only('id', 'title').order_by('title')
+
+    context = {
+        'shows': page,
+        'page': page,
+        'filter_query': filter_query(request),
+        'theaters': [theater async for theater in theaters.aiterator()],
+        'movies': [movie async for movie in movies.aiterator()],
+        **filters,
+    }
+    return render(request, 'movies/shows_list.html', context)
+
+
+async def my_bookings(request):
+    """
+    User's booking history
+    """
+    user, _ = await sync_to_async(_prime_request)(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    sections = await sync_to_async(booking_sections)(request.GET, user.id)
+    context = {
+        'upcoming': sections['upcoming'],
+        'past': sections['past'],
+        'has_bookings': any(section['count'] or not section['is_first'] for section in sections.values()),
+    }
+    return render(request, 'movies/my_bookings.html', context)
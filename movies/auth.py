@@ -0,0 +1,65 @@
+"""
+Authentication without a user query on every request.
+
+CachedAuthenticationMiddleware replaces Django's AuthenticationMiddleware.
+The logged-in User is kept in the cache for USER_CACHE_TIMEOUT seconds,
+keyed by id, and dropped whenever the user is saved or deleted (see
+movies.signals). A cached user is only trusted if the session's auth hash
+still matches it; anything else goes through django.contrib.auth.get_user
+as before. Staff users are never cached, so revoking staff access takes
+effect on the next request whichever worker serves it. With SESSION_MODE=cached_db or signed_cookies the session
+lookup is also served without a query, so steady-state page views make no
+auth-related queries at all.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_cache
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def _cached_user(request):
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return None
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    user = get_cache().get(user_key(user_id))
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if user is None or not session_hash or not constant_time_compare(session_hash, user.get_session_auth_hash()):
+        return None
+    if not user.is_active or user.is_staff or user.is_superuser:
+        # Cached before these could change; let the database decide
+        return None
+    user.backend = backend_path
+    return user
+
+
+def get_user(request):
+    """Like django.contrib.auth.get_user, but served from the cache when possible"""
+    if not hasattr(request, '_cached_user'):
+        user = _cached_user(request) if settings.USER_CACHE_TIMEOUT else None
+        if user is None:
+            user = auth.get_user(request)
+            if user.is_authenticated and not (user.is_staff or user.is_superuser) and settings.USER_CACHE_TIMEOUT:
+                get_cache().set(user_key(user.pk), user, settings.USER_CACHE_TIMEOUT)
+        request._cached_user = user
+    return request._cached_user
+
+
+def invalidate_user(user_id):
+    get_cache().delete(user_key(user_id))
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
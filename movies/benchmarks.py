@@ -0,0 +1,48 @@
+"""
+Helpers shared by the bench_* management commands.
+"""
+import os
+import statistics
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+
+def percentiles(values):
+    """Latency summary in milliseconds of ``values`` in seconds"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] * 1000
+
+    return {'count': len(ordered), 'p50_ms': pick(0.50), 'p95_ms': pick(0.95),
+            'p99_ms': pick(0.99), 'mean_ms': statistics.fmean(ordered) * 1000}
+
+
+@contextmanager
+def throwaway_database(**overrides):
+    """
+    Run the block against a freshly created test database, destroyed on
+    exit, with ``overrides`` applied to settings
+    """
+    setup_test_environment(debug=False)
+    if connection.vendor == 'sqlite':
+        # A file (not shared-memory) database so threads see real locking;
+        # create_test_db replaces the empty file
+        fd, name = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        connection.settings_dict['TEST']['NAME'] = name
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        # No collectstatic manifest is needed to render pages in-process
+        with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+                               **overrides):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,93 @@
+"""
+Versioned cache for catalogue pages.
+
+Every cached page key embeds the current catalogue version. Saving or
+deleting a Movie, Show or Theater bumps the version (see movies.signals),
+so stale pages are simply never looked up again and expire on their own.
+A user's booking sections work the same way with a per-user version that
+every booking change bumps.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOGUE_CACHE_ALIAS', 'default')]
+
+
+def _version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+def _digest(parts):
+    return hashlib.md5('\0'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def catalogue_version():
+    """Return the current catalogue version, starting one if missing"""
+    return _version(CATALOGUE_VERSION_KEY)
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue page"""
+    return _bump(CATALOGUE_VERSION_KEY)
+
+
+def catalogue_changed():
+    """Bump the catalogue version once the current transaction commits"""
+    transaction.on_commit(bump_catalogue_version)
+
+
+def catalogue_key(name, *parts):
+    """Build a cache key for ``name`` at the current catalogue version"""
+    return f'catalogue:{catalogue_version()}:{name}:{_digest(parts)}'
+
+
+def bookings_key(user_id, name, *parts):
+    """
+    Build a cache key for one of a user's booking sections; it changes with
+    their bookings and with the catalogue shown on the cards
+    """
+    version = _version(f'bookings:{user_id}:version')
+    return f'bookings:{user_id}:{version}:{catalogue_version()}:{name}:{_digest(parts)}'
+
+
+def bump_bookings_version(*user_ids):
+    """Invalidate the cached booking sections of ``user_ids``"""
+    for user_id in set(user_ids):
+        _bump(f'bookings:{user_id}:version')
+
+
+def bookings_changed(*user_ids):
+    """Bump the booking versions of ``user_ids`` once the current transaction commits"""
+    transaction.on_commit(lambda: bump_bookings_version(*user_ids))
+
+
+def get_page(key):
+    return get_cache().get(key)
+
+
+def set_page(key, content):
+    get_cache().set(key, content, getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 300))
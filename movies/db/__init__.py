@@ -0,0 +1,10 @@
+"""
+PostgreSQL backend with an in-process connection pool.
+
+Use it with ``ENGINE = 'movies.db'`` (DATABASE_POOL_MODE=pool sets this up).
+Django still opens and "closes" a connection per request, but closing puts
+the psycopg2 connection back in a bounded pool shared by every thread of the
+process. The next request reuses it, so it skips the TCP, TLS and
+authentication handshake, and the process never holds more than
+POOL_MAX_SIZE server connections however many threads it runs.
+"""
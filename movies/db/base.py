@@ -0,0 +1,58 @@
+import psycopg2
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from psycopg2 import extensions
+
+from .pool import ConnectionPool, PoolTimeout, get_pool
+
+
+def _reset(conn):
+    """Roll back anything left open; False if the connection is broken"""
+    if conn.closed:
+        return False
+    status = conn.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    return True
+
+
+def _is_usable(conn):
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """PostgreSQL wrapper whose connections come from, and go back to, a per-process pool"""
+
+    def get_pool(self):
+        settings_dict = self.settings_dict
+        # The test runner points an alias at another database
+        return get_pool(f"{self.alias}:{settings_dict['NAME']}", lambda: ConnectionPool(
+            reset=_reset,
+            is_usable=_is_usable,
+            max_size=settings_dict.get('POOL_MAX_SIZE', 10),
+            timeout=settings_dict.get('POOL_TIMEOUT', 10),
+            max_age=settings_dict.get('POOL_MAX_AGE', 600),
+            health_checks=settings_dict.get('CONN_HEALTH_CHECKS', False),
+        ))
+
+    def get_new_connection(self, conn_params):
+        # Pooled connections skip the parent's setup, so set what it would
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        try:
+            return self.get_pool().get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is not None:
+            # Closed mid-transaction (after an error): don't hand it to anyone else
+            self.get_pool().put(self.connection, discard=self.in_atomic_block)
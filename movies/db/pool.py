@@ -0,0 +1,131 @@
+"""
+Bounded, thread-safe pool of raw DB-API connections.
+
+Connections are handed out most recently used first, so a quiet process
+keeps a few warm connections rather than many lukewarm ones. A checkout
+waits up to ``timeout`` seconds for a free slot. Connections that fail the
+health check, are broken, or are older than ``max_age`` are closed instead
+of reused.
+"""
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool's timeout"""
+
+
+class ConnectionPool:
+    def __init__(self, reset, is_usable, max_size, timeout=10, max_age=600, health_checks=False):
+        self.reset = reset
+        self.is_usable = is_usable
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_checks = health_checks
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = []
+        self.opened_at = {}
+        self.in_use = 0
+        self.stats = dict.fromkeys(['checkouts', 'opened', 'closed', 'failed_checks', 'waits', 'timeouts'], 0)
+        self.wait_time = 0.0
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def get(self, connect):
+        """Check out an idle connection, or open one with ``connect()``"""
+        start = time.perf_counter()
+        if not self.slots.acquire(blocking=False):
+            self._count('waits')
+            if not self.slots.acquire(timeout=self.timeout):
+                self._count('timeouts')
+                raise PoolTimeout(f'No database connection free after {self.timeout}s (pool size {self.max_size})')
+        with self.lock:
+            self.wait_time += time.perf_counter() - start
+            self.stats['checkouts'] += 1
+            self.in_use += 1
+            conn = self.idle.pop() if self.idle else None
+        try:
+            if conn is not None and self.health_checks and not self.is_usable(conn):
+                self._count('failed_checks')
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = connect()
+                with self.lock:
+                    self.opened_at[id(conn)] = time.monotonic()
+                    self.stats['opened'] += 1
+            return conn
+        except BaseException:
+            self._release()
+            raise
+
+    def put(self, conn, discard=False):
+        """Return a checked out connection, closing it if ``discard`` or it can't be reused"""
+        try:
+            reusable = (
+                not discard
+                and time.monotonic() - self.opened_at.get(id(conn), 0) < self.max_age
+                and self.reset(conn)
+            )
+        except Exception:
+            reusable = False
+        if reusable:
+            with self.lock:
+                self.idle.append(conn)
+        else:
+            self._discard(conn)
+        self._release()
+
+    def _release(self):
+        with self.lock:
+            self.in_use -= 1
+        self.slots.release()
+
+    def _discard(self, conn):
+        with self.lock:
+            self.opened_at.pop(id(conn), None)
+            self.stats['closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            self._discard(conn)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'max_size': self.max_size,
+                'open': len(self.opened_at),
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'wait_ms': round(self.wait_time * 1000, 3),
+                **self.stats,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """The process-wide pool for ``key``, created by ``factory()`` on first use"""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def pool_stats():
+    """Snapshot of every pool in this process"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {key: pool.snapshot() for key, pool in pools.items()}
@@ -0,0 +1,131 @@
+"""
+Seat holds for unpaid bookings.
+
+A booking reserves seats as soon as it is created. If payment does not
+complete before ``hold_expires_at`` the reaper marks the booking EXPIRED
+and returns its seats to the show's seat map, one UPDATE per show per
+batch. A cart order expires with its bookings.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bookings_changed
+from .models import Booking, Order, Show
+from .pubsub import seats_changed
+from .seatmap import update_seat_map
+
+logger = logging.getLogger(__name__)
+
+HOLD_STATUSES = ['PENDING', 'FAILED']
+
+
+def hold_expiry(start=None):
+    """Return the time a hold created at ``start`` runs out"""
+    return (start or timezone.now()) + timedelta(minutes=settings.SEAT_HOLD_MINUTES)
+
+
+def stale_holds(now=None):
+    """Unpaid bookings whose hold has run out"""
+    now = now or timezone.now()
+    return Booking.objects.filter(payment_status__in=HOLD_STATUSES).filter(
+        Q(hold_expires_at__lt=now)
+        # Bookings made before holds existed have no expiry of their own
+        | Q(hold_expires_at__isnull=True, booking_date__lt=now - timedelta(minutes=settings.SEAT_HOLD_MINUTES))
+    )
+
+
+def _expire_batch(now, batch_size):
+    with transaction.atomic():
+        rows = list(
+            stale_holds(now)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values('id', 'user_id', 'show_id', 'order_id', 'seat_numbers')[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        seat_numbers = defaultdict(list)
+        for row in rows:
+            seat_numbers[row['show_id']].extend(row['seat_numbers'])
+
+        expired = Booking.objects.filter(
+            id__in=[row['id'] for row in rows], payment_status__in=HOLD_STATUSES
+        ).update(payment_status='EXPIRED')
+        order_ids = {row['order_id'] for row in rows if row['order_id']}
+        if order_ids:
+            Order.objects.filter(id__in=order_ids, payment_status__in=HOLD_STATUSES).update(payment_status='EXPIRED')
+
+        # One read for every show's seat map; a show written since is re-read by update_seat_map
+        shows = Show.objects.select_related('theater').only(
+            'seat_map', 'seat_map_version', 'theater__capacity'
+        ).in_bulk(list(seat_numbers))
+        for show_id, seats in seat_numbers.items():
+            update_seat_map(show_id, lambda seat_map, seats=seats: seat_map.release(seats), shows.get(show_id))
+        seats_changed(*seat_numbers)
+        bookings_changed(*(row['user_id'] for row in rows))
+
+    return expired
+
+
+def expire_stale_holds(now=None, batch_size=500):
+    """
+    Expire every stale hold in batches and return how many were expired
+    """
+    now = now or timezone.now()
+    total = 0
+    while True:
+        expired = _expire_batch(now, batch_size)
+        if not expired:
+            return total
+        total += expired
+
+
+class HoldReaper(threading.Thread):
+    """
+    Background thread that runs expire_stale_holds every ``interval`` seconds
+    """
+
+    def __init__(self, interval, batch_size=500):
+        super().__init__(name='seat-hold-reaper', daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                expired = expire_stale_holds(batch_size=self.batch_size)
+                if expired:
+                    logger.info('Expired %d stale seat holds', expired)
+            except Exception:
+                logger.exception('Seat hold reaper failed')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def start_reaper():
+    """Start the in-process reaper once, if SEAT_HOLD_REAPER_INTERVAL is set"""
+    global _reaper
+    interval = getattr(settings, 'SEAT_HOLD_REAPER_INTERVAL', 0)
+    if not interval:
+        return None
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = HoldReaper(interval)
+            _reaper.start()
+    return _reaper
@@ -0,0 +1,119 @@
+"""
+Responsive poster derivatives.
+
+When a poster is uploaded, a worker thread resizes it to each of
+POSTER_WIDTHS as WebP and JPEG. Posters are never upscaled: widths past
+the original's stop at one derivative of its own size, and srcset labels
+each file with its real width (``Movie.poster_width``). Derivative filenames come from a hash of
+the original's content, so re-uploading the same image reuses the files
+already on disk. Templates use the ``poster_image`` tag (see
+templatetags/posters.py) to emit ``srcset`` markup once the derivatives
+exist, falling back to the original until then.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import ExifTags, Image, ImageOps
+
+from .cache import bump_catalogue_version
+from .models import Movie
+
+logger = logging.getLogger(__name__)
+
+POSTER_WIDTHS = (160, 320, 480, 640)
+POSTER_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+DERIVED_DIR = 'movie_posters/derived'
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'POSTER_WORKERS', 2),
+                               thread_name_prefix='poster')
+
+
+def derivative_name(content_hash, width, ext):
+    return f'{DERIVED_DIR}/{content_hash[:20]}-{width}w.{ext}'
+
+
+def derivative_widths(original_width):
+    """
+    ``(name width, real width)`` of each derivative of a poster
+    ``original_width`` pixels wide
+    """
+    widths = []
+    for width in POSTER_WIDTHS:
+        widths.append((width, min(width, original_width)))
+        if width >= original_width:
+            break
+    return widths
+
+
+def oriented_width(image):
+    """Width of ``image`` once its EXIF orientation is applied, read from the header alone"""
+    orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    return image.height if orientation in (5, 6, 7, 8) else image.width
+
+
+def build_derivatives(poster_file):
+    """
+    Write every missing derivative of ``poster_file`` and return its
+    content hash and oriented width
+    """
+    poster_file.open('rb')
+    try:
+        data = poster_file.read()
+    finally:
+        poster_file.close()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    with Image.open(BytesIO(data)) as original:
+        original_width = oriented_width(original)
+        missing = [
+            (width, real_width, ext) for width, real_width in derivative_widths(original_width)
+            for ext in POSTER_FORMATS
+            if not default_storage.exists(derivative_name(content_hash, width, ext))
+        ]
+        if not missing:
+            return content_hash, original_width
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for width, real_width, ext in missing:
+        height = round(image.height * real_width / image.width)
+        resized = image.resize((real_width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, POSTER_FORMATS[ext], quality=80, optimize=True)
+        default_storage.save(derivative_name(content_hash, width, ext), ContentFile(buffer.getvalue()))
+    return content_hash, original_width
+
+
+def process_poster(movie_id):
+    """Build derivatives for a movie's poster and record its content hash"""
+    try:
+        movie = Movie.objects.only('poster', 'poster_hash', 'poster_width').get(id=movie_id)
+        if not movie.poster:
+            return
+        content_hash, width = build_derivatives(movie.poster)
+        if (content_hash, width) != (movie.poster_hash, movie.poster_width):
+            Movie.objects.filter(id=movie_id, poster=movie.poster.name).update(
+                poster_hash=content_hash, poster_width=width)
+            bump_catalogue_version()
+    except Exception:
+        logger.exception('Could not build poster derivatives for movie %s', movie_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_poster(movie_id):
+    """Build derivatives in the background so saving a movie isn't blocked"""
+    return _executor.submit(process_poster, movie_id)
+
+
+def srcset(content_hash, original_width, ext):
+    """The derivatives built for a poster, each with its real width"""
+    return ', '.join(
+        f'{default_storage.url(derivative_name(content_hash, width, ext))} {real_width}w'
+        for width, real_width in derivative_widths(original_width)
+    )
@@ -0,0 +1,198 @@
+"""
+Per-view performance instrumentation.
+
+PerformanceMiddleware records query count, DB time, template render time
+and response size for every request, keyed by URL name. It reports them
+in a Server-Timing header, keeps a rolling window of samples per view and
+checks QUERY_BUDGETS, raising QueryBudgetExceeded when
+QUERY_BUDGET_ENFORCE is on (e.g. under tests). Transaction control
+(BEGIN, savepoints) isn't counted: whether it is issued as a statement
+depends on the database and on how atomic blocks nest, as in tests.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+_unmetered = contextvars.ContextVar('unmetered', default=False)
+TRANSACTION_CONTROL = re.compile(r'\s*(BEGIN|SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its budget allows"""
+
+
+@contextmanager
+def unmetered():
+    """Leave queries out of the current request's count and budget (work done for a background job)"""
+    token = _unmetered.set(True)
+    try:
+        yield
+    finally:
+        _unmetered.reset(token)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a database execute_wrapper
+        if _unmetered.get() or TRANSACTION_CONTROL.match(sql):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class ViewStats:
+    """
+    Rolling window of the most recent samples for every view
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.lock = threading.Lock()
+
+    def record(self, view_name, sample):
+        with self.lock:
+            self.samples[view_name].append(sample)
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+    @staticmethod
+    def _percentile(values, fraction):
+        index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+        return values[index]
+
+    def snapshot(self):
+        """Summary per view: request count and p50/p95/p99 of each metric"""
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        summary = {}
+        for name, values in samples.items():
+            summary[name] = {'count': len(values)}
+            for metric in ['total_ms', 'db_ms', 'template_ms', 'queries', 'bytes']:
+                ordered = sorted(sample[metric] for sample in values)
+                summary[name][metric] = {
+                    'p50': self._percentile(ordered, 0.50),
+                    'p95': self._percentile(ordered, 0.95),
+                    'p99': self._percentile(ordered, 0.99),
+                    'max': ordered[-1],
+                }
+        return summary
+
+
+view_stats = ViewStats(getattr(settings, 'VIEW_STATS_WINDOW', 1000))
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current_metrics.get()
+            if metrics is not None:
+                metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend that reports render time to PerformanceMiddleware
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.enforce = getattr(settings, 'QUERY_BUDGET_ENFORCE', False)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # Async views run their queries on worker threads, so only timings
+        # and sizes are recorded; query counts and budgets are sync-only.
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        metrics.queries = None
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, total):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+
+        timings = [f'tpl;dur={metrics.template_time * 1000:.1f}', f'total;dur={total * 1000:.1f}']
+        if metrics.queries is not None:
+            timings.insert(0, f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"')
+        response['Server-Timing'] = ', '.join(timings)
+        view_stats.record(view_name, {
+            'total_ms': total * 1000,
+            'db_ms': metrics.db_time * 1000,
+            'template_ms': metrics.template_time * 1000,
+            'queries': metrics.queries or 0,
+            'bytes': size,
+        })
+
+        budget = self.budgets.get(view_name)
+        if budget is not None and metrics.queries is not None and metrics.queries > budget:
+            message = f'{view_name} ran {metrics.queries} queries (budget {budget})'
+            if self.enforce:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
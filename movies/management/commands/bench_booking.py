@@ -0,0 +1,296 @@
+import http.cookiejar
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, time as show_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client
+
+from movies.benchmarks import percentiles, throwaway_database
+from movies.models import Booking, Movie, Show, Theater
+
+BENCH_PASSWORD = 'bench-pass-4821'
+STEPS = ['home', 'movie_detail', 'booking_page', 'booking_post', 'payment_post', 'payment_settle', 'confirmation']
+SETTLE_TIMEOUT = 30
+BOOKING_ID = re.compile(r'/payment/(\d+)/')
+
+
+class ClientTransport:
+    """In-process requests through the Django test client"""
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get('Location', '')
+
+    def post(self, path, data):
+        response = self.client.post(path, data)
+        return response.status_code, response.get('Location', '')
+
+    def close(self):
+        connection.close()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    """Requests to a locally running server (e.g. gunicorn) over HTTP"""
+
+    def __init__(self, base_url, user):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect
+        )
+        self.get('/login/')
+        self.post('/login/', {'username': user.username, 'password': BENCH_PASSWORD})
+
+    def _open(self, request):
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status, response.headers.get('Location', '')
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Location', '')
+
+    def get(self, path):
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, data):
+        csrf = next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+        body = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': csrf}).encode()
+        return self._open(urllib.request.Request(
+            self.base_url + path, data=body, headers={'Referer': self.base_url + path}
+        ))
+
+    def close(self):
+        pass
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.lock_wait = 0.0
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, step, seconds):
+        with self.lock:
+            self.latencies[step].append(seconds)
+
+    def add_lock_wait(self, seconds):
+        with self.lock:
+            self.lock_wait += seconds
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] += 1
+
+
+def seat_write_timer(recorder):
+    """execute_wrapper that charges writes to the show table as lock wait"""
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if sql.startswith('UPDATE') and Show._meta.db_table in sql:
+                recorder.add_lock_wait(time.perf_counter() - start)
+    return wrapper
+
+
+class Command(BaseCommand):
+    help = 'Load-test the booking funnel with many concurrent users fighting over a few shows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent simulated users')
+        parser.add_argument('--iterations', type=int, default=10, help='Funnel runs per user')
+        parser.add_argument('--shows', type=int, default=2, help='Number of hot shows')
+        parser.add_argument('--capacity', type=int, default=100, help='Seats per hot show')
+        parser.add_argument('--base-url', help='Benchmark a running server (seeds the configured database, '
+                                                      'removing the rows again afterwards)')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Previous results JSON to compare against')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['base_url']:
+            results = self.run(options)
+        else:
+            # In-process runs use a throwaway database so real data is never touched
+            with throwaway_database():
+                results = self.run(options)
+
+        self.report(results, options)
+
+    def seed(self, options):
+        tag = f'bench-{int(time.time())}'
+        movie = Movie.objects.create(title=f'Benchmark {tag}', description='Load test movie', genre='ACTION',
+                                     duration=120, release_date=date.today())
+        theater = Theater.objects.create(name=f'Benchmark {tag}', location='Local', capacity=options['capacity'])
+        # Four shows a day, three hours apart, so the 120-minute movie never overlaps itself
+        shows = [
+            Show.objects.create(movie=movie, theater=theater, show_date=date.today() + timedelta(days=1 + i // 4),
+                                show_time=show_time(10 + 3 * (i % 4), 0), price=250,
+                                available_seats=options['capacity'])
+            for i in range(options['shows'])
+        ]
+        password = make_password(BENCH_PASSWORD)
+        User.objects.bulk_create([
+            User(username=f'{tag}-{i}', password=password) for i in range(options['users'])
+        ])
+        return movie, shows, list(User.objects.filter(username__startswith=f'{tag}-'))
+
+    def unseed(self, movie, shows, users):
+        """Remove what seed() created, with the bookings, orders and sales made on it"""
+        User.objects.filter(id__in=[user.id for user in users]).delete()
+        movie.delete()
+        Theater.objects.filter(id__in={show.theater_id for show in shows}).delete()
+
+    def run(self, options):
+        movie, shows, users = self.seed(options)
+        try:
+            return self.load_test(options, movie, shows, users)
+        finally:
+            # A running server uses the real database; keep the benchmark off its pages
+            self.unseed(movie, shows, users)
+
+    def load_test(self, options, movie, shows, users):
+        recorder = Recorder()
+        rng = random.Random(options['seed'])
+        seeds = [rng.random() for _ in users]
+
+        def simulate(user, seed):
+            user_rng = random.Random(seed)
+            transport = (HttpTransport(options['base_url'], user) if options['base_url']
+                         else ClientTransport(user))
+            with connection.execute_wrapper(seat_write_timer(recorder)):
+                for _ in range(options['iterations']):
+                    show = user_rng.choice(shows)
+                    try:
+                        self.funnel(transport, recorder, movie, show, user_rng)
+                    except Exception as e:
+                        recorder.error(type(e).__name__)
+            transport.close()
+
+        threads = [threading.Thread(target=simulate, args=(user, seed)) for user, seed in zip(users, seeds)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {
+            'elapsed_s': elapsed,
+            'requests': sum(len(v) for v in recorder.latencies.values()),
+            'throughput_rps': sum(len(v) for v in recorder.latencies.values()) / elapsed,
+            'lock_wait_s': recorder.lock_wait,
+            'steps': {step: percentiles(recorder.latencies[step]) for step in STEPS},
+            'errors': dict(recorder.errors),
+            'violations': self.check_inventory(shows),
+        }
+
+    def funnel(self, transport, recorder, movie, show, rng):
+        def timed(step, call, *args):
+            start = time.perf_counter()
+            status, location = call(*args)
+            recorder.add(step, time.perf_counter() - start)
+            if status >= 400:
+                recorder.error(f'{step}_{status}')
+            return status, location
+
+        timed('home', transport.get, '/')
+        timed('movie_detail', transport.get, f'/movie/{movie.id}/')
+        timed('booking_page', transport.get, f'/booking/{show.id}/')
+        _, location = timed('booking_post', transport.post, f'/booking/{show.id}/', {'seats': rng.randint(1, 4)})
+        match = BOOKING_ID.search(location)
+        if not match:
+            recorder.error('sold_out')
+            return
+        booking_id = match.group(1)
+        timed('payment_post', transport.post, f'/payment/{booking_id}/',
+              {'payment_method': 'UPI', 'upi_id': 'bench@upi', 'idempotency_key': f'bench-{booking_id}'})
+        status = self.wait_for_settlement(recorder, booking_id)
+        if status == 'COMPLETED':
+            timed('confirmation', transport.get, f'/booking/confirmation/{booking_id}/')
+        else:
+            recorder.error('payment_failed' if status == 'FAILED' else 'payment_unsettled')
+
+    def wait_for_settlement(self, recorder, booking_id):
+        """Time from the payment POST returning until the workers settle it"""
+        start = time.perf_counter()
+        status = 'PROCESSING'
+        while status == 'PROCESSING' and time.perf_counter() - start < SETTLE_TIMEOUT:
+            time.sleep(0.01)
+            status = Booking.objects.filter(id=booking_id).values_list('payment_status', flat=True).first()
+        recorder.add('payment_settle', time.perf_counter() - start)
+        return status
+
+    def check_inventory(self, shows):
+        """Every seat is either still available or held by exactly one booking"""
+        violations = []
+        for show in Show.objects.filter(id__in=[s.id for s in shows]).select_related('theater'):
+            sold = Booking.objects.filter(show=show).exclude(payment_status='EXPIRED') \
+                .aggregate(total=Sum('seats_booked'))['total'] or 0
+            if show.available_seats < 0 or sold > show.theater.capacity:
+                violations.append({'show': show.id, 'type': 'oversell', 'sold': sold,
+                                   'available': show.available_seats})
+            elif sold + show.available_seats != show.theater.capacity:
+                violations.append({'show': show.id, 'type': 'lost_update', 'sold': sold,
+                                   'available': show.available_seats})
+        return violations
+
+    def report(self, results, options):
+        try:
+            results['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                               text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            results['commit'] = None
+        results['options'] = {k: options[k] for k in ['users', 'iterations', 'shows', 'capacity', 'base_url']}
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        self.stdout.write(f"{results['requests']} requests in {results['elapsed_s']:.2f}s "
+                          f"({results['throughput_rps']:.1f} req/s), lock wait {results['lock_wait_s']:.3f}s")
+        for step in STEPS:
+            stats = results['steps'][step]
+            if not stats:
+                continue
+            line = f"  {step:<14} n={stats['count']:<5} p50={stats['p50_ms']:7.1f}ms " \
+                   f"p95={stats['p95_ms']:7.1f}ms p99={stats['p99_ms']:7.1f}ms"
+            old = previous and previous['steps'].get(step)
+            if old:
+                line += f"  (p95 {stats['p95_ms'] - old['p95_ms']:+.1f}ms vs {previous.get('commit')})"
+            self.stdout.write(line)
+        if results['errors']:
+            self.stdout.write(f"  errors: {results['errors']}")
+        if results['violations']:
+            self.stdout.write(self.style.ERROR(f"  inventory violations: {results['violations']}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('  no oversells or lost updates'))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+from movies.benchmarks import percentiles
+from movies.db.pool import pool_stats
+
+MODES = ['close', 'persistent', 'pool']
+POOLED_ENGINE = 'movies.db'
+
+
+class Command(BaseCommand):
+    help = ('Compare per-request connection overhead with a new connection per request, persistent '
+            'connections and the connection pool (PostgreSQL only)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Simulated requests per thread per mode')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent worker threads')
+        parser.add_argument('--pool-size', type=int, default=4, help='Pool size for the pool mode')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+
+    def handle(self, *args, **options):
+        base = connections.databases[options['database']]
+        if base['ENGINE'] not in ('django.db.backends.postgresql', POOLED_ENGINE):
+            self.stdout.write(f"{base['ENGINE']}: skipping pool mode, which needs PostgreSQL")
+            modes = [mode for mode in options['modes'].split(',') if mode != 'pool']
+        else:
+            modes = options['modes'].split(',')
+        for mode in modes:
+            if mode not in MODES:
+                raise CommandError(f'Unknown mode {mode!r}; choose from {", ".join(MODES)}')
+
+        results = {}
+        for mode in modes:
+            results[mode] = self.run(mode, self.settings_for(mode, base, options), options)
+            result, request = results[mode], results[mode]['request']
+            self.stdout.write(
+                f"{mode:>10}: {result['connects']} connections opened, {result['requests_per_s']:.0f} requests/s, "
+                f"p50 {request['p50_ms']:.2f}ms, p95 {request['p95_ms']:.2f}ms, p99 {request['p99_ms']:.2f}ms"
+            )
+            if 'pool' in results[mode]:
+                self.stdout.write(f"            pool: {results[mode]['pool']}")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def settings_for(self, mode, base, options):
+        settings_dict = dict(base, OPTIONS=dict(base.get('OPTIONS', {})))
+        if mode == 'close':
+            settings_dict.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+        elif mode == 'persistent':
+            settings_dict.update(ENGINE=base['ENGINE'].replace(POOLED_ENGINE, 'django.db.backends.postgresql'),
+                                 CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        else:
+            settings_dict.update(ENGINE=POOLED_ENGINE, CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True,
+                                 POOL_MAX_SIZE=options['pool_size'])
+        return settings_dict
+
+    def run(self, mode, settings_dict, options):
+        alias = f'bench-{mode}'
+        backend = load_backend(settings_dict['ENGINE'])
+        latencies = []
+        connects = []
+        lock = threading.Lock()
+
+        def count_connect(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    connects.append(1)
+
+        def worker():
+            wrapper = backend.DatabaseWrapper(dict(settings_dict), alias=alias)
+            timings = []
+            try:
+                for _ in range(options['requests']):
+                    start = time.perf_counter()
+                    # What request_started and request_finished do around each request
+                    wrapper.close_if_unusable_or_obsolete()
+                    with wrapper.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                    wrapper.close_if_unusable_or_obsolete()
+                    timings.append(time.perf_counter() - start)
+            finally:
+                wrapper.close()
+            with lock:
+                latencies.extend(timings)
+
+        connection_created.connect(count_connect)
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connect)
+
+        result = {
+            'request': percentiles(latencies),
+            'requests_per_s': len(latencies) / elapsed,
+            'connects': len(connects),
+        }
+        pools = {key: stats for key, stats in pool_stats().items() if key.startswith(f'{alias}:')}
+        if pools:
+            # Pooled checkouts fire connection_created too; count real connections
+            result['pool'] = next(iter(pools.values()))
+            result['connects'] = result['pool']['opened']
+        return result
@@ -0,0 +1,95 @@
+import time
+from datetime import date, time as show_time, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from movies.benchmarks import throwaway_database
+from movies.models import Movie, Show, Theater
+from movies.pricing import GENRES, compute_prices, load_shows, reprice_shows
+from movies.scheduling import show_runtime
+
+SHOW_TIMES = [show_time(10, 0), show_time(13, 30), show_time(17, 0), show_time(20, 30)]
+
+
+class Command(BaseCommand):
+    help = 'Time the vectorized pricing pass on synthetic arrays and reprice_shows end to end on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shows', type=int, default=1_000_000, help='Synthetic shows to price in memory')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the synthetic shows')
+        parser.add_argument('--db', type=int, default=100_000, metavar='SHOWS',
+                            help='Seed SHOWS shows into a throwaway database and time reprice_shows '
+                                 'end to end, writes included (0 skips it)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.bench_compute(options)
+        if options['db']:
+            with throwaway_database():
+                self.bench_database(options)
+
+    def bench_compute(self, options):
+        rng = np.random.default_rng(options['seed'])
+        n = options['shows']
+        capacity = rng.integers(50, 400, n).astype(np.float64)
+        arrays = {
+            'base': rng.choice([150.0, 200.0, 250.0, 300.0], n),
+            'available': np.floor(capacity * rng.random(n)),
+            'capacity': capacity,
+            'hours': rng.uniform(0, 24 * 14, n),
+            'weekday': rng.integers(0, 7, n),
+            'genre': rng.integers(0, len(GENRES), n),
+        }
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            prices = compute_prices(**arrays)
+            timings.append(time.perf_counter() - started)
+        best, mean = min(timings), sum(timings) / len(timings)
+        self.stdout.write(
+            f'compute_prices: {n:,} shows in {best * 1000:.1f}ms best / {mean * 1000:.1f}ms mean '
+            f'({n / best / 1e6:.1f}M shows/s), {np.count_nonzero(prices != arrays["base"]):,} priced off base'
+        )
+
+    def bench_database(self, options):
+        n = options['db']
+        movies = Movie.objects.bulk_create([
+            Movie(title=f'Pricing {i}', description='', genre=genre, duration=120, release_date=date.today())
+            for i, genre in enumerate(GENRES)
+        ])
+        theaters = Theater.objects.bulk_create([
+            Theater(name=f'Pricing {i}', location='Local', capacity=100 + 50 * (i % 8)) for i in range(len(movies))
+        ])
+        rng = np.random.default_rng(options['seed'])
+        today = timezone.localdate()
+        # One show per theater and time slot, the movies taking turns, so no screen is double-booked
+        per_day = len(theaters) * len(SHOW_TIMES)
+        runtime = show_runtime(120)
+        shows = []
+        for i in range(n):
+            day, slot = divmod(i, per_day)
+            theater, at = divmod(slot, len(SHOW_TIMES))
+            shows.append(Show(movie=movies[(day + slot) % len(movies)], theater=theaters[theater],
+                              show_date=today + timedelta(days=day + 1), show_time=SHOW_TIMES[at], price=250,
+                              available_seats=int(rng.integers(0, theaters[theater].capacity + 1)),
+                              runtime=runtime))
+        Show.objects.bulk_create(shows, batch_size=5000)
+
+        started = time.perf_counter()
+        columns = load_shows(timezone.localtime())
+        loaded = time.perf_counter()
+        compute_prices(columns['base'], columns['available'], columns['capacity'],
+                       columns['hours'], columns['weekday'], columns['genre'])
+        computed = time.perf_counter()
+        self.stdout.write(f'database: {n:,} shows loaded in {loaded - started:.2f}s, '
+                          f'priced in {(computed - loaded) * 1000:.1f}ms')
+
+        # Load, price and write back; the first run moves most shows off their base
+        for run in ('first', 'steady'):
+            started = time.perf_counter()
+            repriced = reprice_shows()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'reprice_shows ({run}): {n:,} shows, {repriced:,} rows written, '
+                              f'{elapsed:.2f}s end to end ({n / elapsed:,.0f} shows/s)')
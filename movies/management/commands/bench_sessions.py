@@ -0,0 +1,97 @@
+import json
+import time
+from datetime import date, time as show_time, timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from movies.benchmarks import percentiles, throwaway_database
+from movies.cache import get_cache
+from movies.models import Booking, Movie, Show, Theater
+
+MODES = {
+    # name: (session engine, user cache timeout)
+    'db': ('django.contrib.sessions.backends.db', 0),
+    'cached_db': ('django.contrib.sessions.backends.cached_db', 300),
+    'signed_cookies': ('django.contrib.sessions.backends.signed_cookies', 300),
+}
+AUTH_TABLES = (Session._meta.db_table, User._meta.db_table)
+
+
+class Command(BaseCommand):
+    help = 'Compare auth/session queries and latency of logged-in page views across session modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page per mode')
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated session modes')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        for mode in modes:
+            if mode not in MODES:
+                self.stderr.write(f'Unknown mode {mode!r}; choose from {", ".join(MODES)}')
+                return
+
+        # Always a throwaway database so real data is never touched
+        with throwaway_database(QUERY_BUDGET_ENFORCE=False):
+            paths = self.seed()
+            results = {mode: self.run(mode, paths, options['requests']) for mode in modes}
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+    def seed(self):
+        user = User.objects.create_user('bench-sessions', password='bench-pass-4821')
+        movie = Movie.objects.create(title='Session benchmark', description='Benchmark movie', genre='ACTION',
+                                     duration=120, release_date=date.today())
+        theater = Theater.objects.create(name='Session benchmark', location='Local', capacity=100)
+        show = Show.objects.create(movie=movie, theater=theater, show_date=date.today() + timedelta(days=1),
+                                   show_time=show_time(18, 0), price=250, available_seats=98)
+        booking = Booking.objects.create(user=user, show=show, seats_booked=2, total_price=500)
+        return {
+            'booking_page': f'/booking/{show.id}/',
+            'payment_page': f'/payment/{booking.id}/',
+            'my_bookings': '/my-bookings/',
+        }
+
+    def run(self, mode, paths, requests):
+        engine, user_cache_timeout = MODES[mode]
+        with override_settings(SESSION_ENGINE=engine, USER_CACHE_TIMEOUT=user_cache_timeout):
+            get_cache().clear()
+            client = Client()
+            client.force_login(User.objects.get(username='bench-sessions'))
+            results = {}
+            for page, path in paths.items():
+                client.get(path)  # warm the session and user caches
+                latencies, queries, auth_queries = [], 0, 0
+                for _ in range(requests):
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        response = client.get(path)
+                        latencies.append(time.perf_counter() - start)
+                    if response.status_code != 200:
+                        raise RuntimeError(f'{path} returned {response.status_code} in {mode} mode')
+                    queries += len(captured)
+                    auth_queries += sum(
+                        any(table in query['sql'] for table in AUTH_TABLES) for query in captured
+                    )
+                results[page] = dict(percentiles(latencies), queries_per_request=queries / requests,
+                                     auth_queries_per_request=auth_queries / requests)
+        return results
+
+    def report(self, results):
+        for mode, pages in results.items():
+            self.stdout.write(mode)
+            for page, stats in pages.items():
+                self.stdout.write(
+                    f"  {page:<13} queries={stats['queries_per_request']:4.1f} "
+                    f"auth={stats['auth_queries_per_request']:4.1f} "
+                    f"p50={stats['p50_ms']:6.2f}ms p95={stats['p95_ms']:6.2f}ms"
+                )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from movies.images import schedule_poster
+from movies.models import Movie
+
+
+class Command(BaseCommand):
+    help = 'Build responsive poster derivatives for movies that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every poster, not just missing ones')
+
+    def handle(self, *args, **options):
+        movies = Movie.objects.exclude(poster='').exclude(poster__isnull=True)
+        if not options['all']:
+            movies = movies.filter(poster_hash='')
+        futures = [schedule_poster(movie_id) for movie_id in movies.values_list('id', flat=True)]
+        for future in futures:
+            future.result()
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(futures)} poster(s)'))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.holds import expire_stale_holds
+
+
+class Command(BaseCommand):
+    help = 'Expire unpaid bookings whose seat hold has run out and return their seats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Bookings expired per transaction')
+        parser.add_argument('--loop', type=int, default=0, metavar='SECONDS',
+                            help='Keep running, sweeping every SECONDS')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_stale_holds(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Expired {expired} stale seat hold(s)'))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,269 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from movies.analytics import record_offers
+from movies.cache import bump_catalogue_version
+from movies.models import Movie, Show, Theater
+from movies.scheduling import ScheduleIndex, format_slot, show_runtime, slot
+from movies.seatmap import SeatMap
+from movies.showtimes import invalidate_movie
+
+# model, natural key, importable columns
+KINDS = {
+    'movies': (Movie, ['title', 'release_date'],
+               ['title', 'description', 'genre', 'duration', 'release_date', 'trailer_url', 'rating', 'is_active']),
+    'theaters': (Theater, ['name', 'location'], ['name', 'location', 'capacity', 'description']),
+    'shows': (Show, ['movie', 'theater', 'show_date', 'show_time'],
+              ['movie', 'theater', 'show_date', 'show_time', 'price', 'available_seats']),
+}
+
+
+def read_records(path, file_format):
+    """
+    Yield (line number, dict) pairs without loading the whole file; a JSON
+    line that is not an object comes back as the ValidationError to report
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = ValidationError(f'Invalid JSON: {e.msg}')
+                if not isinstance(record, (dict, ValidationError)):
+                    record = ValidationError(f'Expected a JSON object, got {type(record).__name__}')
+                yield line_num, record
+
+
+class ForeignKeyCache:
+    """
+    Resolves show rows' movie/theater references with one query per model
+    """
+
+    def __init__(self):
+        self.movies = None
+        self.theaters = None
+
+    def movie(self, value):
+        """Return (id, duration) for a movie title or id"""
+        if self.movies is None:
+            self.movies = {}
+            for movie_id, title, duration in Movie.objects.order_by('release_date').values_list(
+                    'id', 'title', 'duration'):
+                self.movies[title] = (movie_id, duration)
+                self.movies[str(movie_id)] = (movie_id, duration)
+        try:
+            return self.movies[str(value)]
+        except KeyError:
+            raise ValidationError({'movie': f'Unknown movie: {value}'})
+
+    def theater(self, value):
+        """Return (id, capacity) for a theater name or id"""
+        if self.theaters is None:
+            self.theaters = {}
+            for theater_id, name, capacity in Theater.objects.values_list('id', 'name', 'capacity'):
+                self.theaters[name] = (theater_id, capacity)
+                self.theaters[str(theater_id)] = (theater_id, capacity)
+        try:
+            return self.theaters[str(value)]
+        except KeyError:
+            raise ValidationError({'theater': f'Unknown theater: {value}'})
+
+
+def build_instance(kind, record, fk_cache):
+    """
+    Validate a record against the model's field constraints and return an
+    unsaved instance. Missing columns take the field default.
+    """
+    model, _, columns = KINDS[kind]
+    values = {}
+    errors = {}
+    for column in columns:
+        raw = record.get(column)
+        if raw in (None, ''):
+            continue
+        if kind == 'shows' and column in ('movie', 'theater'):
+            continue
+        field = model._meta.get_field(column)
+        try:
+            values[column] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[column] = e.messages
+
+    if kind == 'shows':
+        try:
+            values['movie_id'], duration = fk_cache.movie(record.get('movie'))
+            values['runtime'] = show_runtime(duration)
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        try:
+            values['theater_id'], capacity = fk_cache.theater(record.get('theater'))
+            values.setdefault('available_seats', capacity)
+            if 'available_seats' not in errors and not 0 <= values['available_seats'] <= capacity:
+                errors['available_seats'] = [f'Must be between 0 and the theater capacity of {capacity}.']
+        except ValidationError as e:
+            errors.update(e.message_dict)
+
+    # Required fields (no default, not blank) must be present; a show's
+    # seat count falls back to its theater's capacity
+    for field in model._meta.concrete_fields:
+        name = field.attname
+        if name in values or field.primary_key or field.has_default() or field.blank or field.null \
+                or getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            continue
+        if field.name not in errors and not (kind == 'shows' and field.name == 'available_seats'):
+            errors[field.name] = ['This field is required.']
+
+    if errors:
+        raise ValidationError(errors)
+    if kind == 'shows':
+        # available_seats is the seat map's free count, see movies.seatmap
+        seat_map = SeatMap.with_taken(capacity, capacity - values['available_seats'])
+        values['seat_map'] = seat_map.to_bytes()
+        values['available_seats'] = seat_map.free_count
+    return model(**values)
+
+
+def reject_clashes(instances, lines):
+    """
+    Drop shows that overlap a stored show or an earlier one in the batch in
+    the same theater; returns ``(line number, message)`` for each
+    """
+    shows = instances.values()
+    index = ScheduleIndex.load(min(show.show_date for show in shows), max(show.show_date for show in shows),
+                               theater_ids={show.theater_id for show in shows}, replacing=set(instances))
+    rejected = []
+    for key, show in list(instances.items()):
+        start, end = slot(show.show_date, show.show_time, show.runtime)
+        clash = index.conflict(show.theater_id, start, end)
+        if clash:
+            del instances[key]
+            rejected.append((lines[key], f'Theater is already busy {format_slot(*clash[:2])}'))
+        else:
+            index.add(show.theater_id, start, end)
+    return rejected
+
+
+class Command(BaseCommand):
+    help = 'Stream movies, theaters or shows from a CSV or JSON-Lines file and upsert them in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(KINDS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                            help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip records already committed by a previous run')
+        parser.add_argument('--max-errors', type=int, default=100,
+                            help='Abort after this many invalid records')
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        checkpoint_path = f'{path}.checkpoint'
+
+        skip = 0
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                skip = json.load(f)['records']
+            self.stdout.write(f'Resuming after {skip} record(s)')
+
+        model, unique_fields, columns = KINDS[kind]
+        unique_fields = [model._meta.get_field(name).attname for name in unique_fields]
+        fk_cache = ForeignKeyCache()
+        records = islice(read_records(path, file_format), skip, None)
+        done, imported, errors = skip, 0, 0
+        movie_ids = set()
+        started = time.monotonic()
+
+        while True:
+            batch = list(islice(records, options['batch_size']))
+            if not batch:
+                break
+
+            # Keyed by natural key: a row may only be upserted once per statement
+            instances = {}
+            lines = {}
+            invalid = []
+            for line_num, record in batch:
+                try:
+                    if isinstance(record, ValidationError):
+                        raise record
+                    instance = build_instance(kind, record, fk_cache)
+                    key = tuple(getattr(instance, name) for name in unique_fields)
+                    instances[key], lines[key] = instance, line_num
+                except ValidationError as e:
+                    invalid.append((line_num, '; '.join(e.messages)))
+            if model is Show and instances:
+                invalid.extend(reject_clashes(instances, lines))
+            for line_num, message in sorted(invalid):
+                errors += 1
+                self.stderr.write(f'Line {line_num}: {message}')
+                if errors > options['max_errors']:
+                    raise CommandError('Too many invalid records; resume with --resume after fixing them')
+
+            if instances:
+                present = {name for _, record in batch if isinstance(record, dict)
+                           for name, value in record.items() if value not in (None, '')}
+                update_fields = [model._meta.get_field(name).attname for name in columns
+                                 if name in present and model._meta.get_field(name).attname not in unique_fields]
+                if model is Movie:
+                    update_fields.append('updated_at')
+                elif model is Show:
+                    if 'available_seats' in update_fields:
+                        # A show already on sale keeps the seats its bookings hold
+                        update_fields.remove('available_seats')
+                    if update_fields:
+                        update_fields.append('runtime')
+                    if 'price' in update_fields:
+                        # An imported price is the new base the repricer works from
+                        update_fields.append('base_price')
+                with transaction.atomic():
+                    if update_fields:
+                        model.objects.bulk_create(instances.values(), update_conflicts=True,
+                                                  unique_fields=unique_fields, update_fields=update_fields)
+                    else:
+                        model.objects.bulk_create(instances.values(), ignore_conflicts=True)
+                    # bulk_create skips post_save; keep the sales rollup's seats offered current
+                    if model is Show:
+                        shows = instances.values()
+                        record_offers(Show.objects.filter(
+                            show_date__range=(min(show.show_date for show in shows), max(show.show_date for show in shows)),
+                            theater_id__in={show.theater_id for show in shows},
+                        ))
+                    elif model is Theater and 'capacity' in update_fields:
+                        record_offers(Show.objects.filter(theater__name__in=[key[0] for key in instances]))
+                imported += len(instances)
+                if model is Show:
+                    movie_ids.update(instance.movie_id for instance in instances.values())
+
+            done += len(batch)
+            with open(checkpoint_path, 'w') as f:
+                json.dump({'records': done}, f)
+            rate = (done - skip) / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{done} record(s) read, {imported} upserted, {errors} invalid ({rate:.0f}/s)')
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        # bulk_create skips post_save, so invalidate cached catalogue pages
+        # and the showtimes grids of the imported shows' movies here
+        bump_catalogue_version()
+        for movie_id in movie_ids:
+            invalidate_movie(movie_id)
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} {kind} ({errors} invalid record(s) skipped)'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.pricing import reprice_shows
+
+
+class Command(BaseCommand):
+    help = 'Recompute demand-based prices for every upcoming show'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Shows written per UPDATE statement')
+        parser.add_argument('--loop', type=int, default=0, metavar='SECONDS',
+                            help='Keep running, repricing every SECONDS')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            repriced = reprice_shows(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Repriced {repriced} show(s) in {time.perf_counter() - started:.2f}s'
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
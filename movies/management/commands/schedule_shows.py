@@ -0,0 +1,150 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from movies.analytics import record_offers
+from movies.cache import bump_catalogue_version
+from movies.models import Movie, Show, Theater
+from movies.scheduling import ScheduleIndex, show_runtime, slot
+from movies.showtimes import invalidate_movie
+
+DEFAULT_TIMES = ['10:00', '13:30', '17:00', '20:30']
+DEFAULT_PRICE = '250.00'
+
+
+def parse_time(value):
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def random_template(movies, theaters, times, price, rng):
+    """
+    The classic demo schedule: each movie at up to 3 random theaters,
+    2-3 random times per theater, every day.
+    """
+    template = []
+    for movie in movies:
+        for theater in rng.sample(theaters, min(3, len(theaters))):
+            template.append({
+                'movies': [movie],
+                'theaters': [theater],
+                'times': rng.sample(times, min(len(times), rng.randint(2, 3))),
+                'price': price,
+                'weekdays': None,
+            })
+    return template
+
+
+def load_template(path, movies, theaters, times, price):
+    """
+    Read a JSON schedule template, a list of entries like::
+
+        {"theaters": ["PVR Cinemas"], "movies": ["Jawan"] or "*",
+         "times": ["10:00", "20:30"], "weekdays": [4, 5, 6], "price": "300.00"}
+
+    Theaters and movies are matched by name/title or id; every key is optional.
+    """
+    movies_by_key = {**{m.title: m for m in movies}, **{m.id: m for m in movies}}
+    theaters_by_key = {**{t.name: t for t in theaters}, **{t.id: t for t in theaters}}
+
+    def resolve(keys, lookup, kind):
+        if keys in (None, '*'):
+            return list({obj.id: obj for obj in lookup.values()}.values())
+        try:
+            return [lookup[key] for key in keys]
+        except KeyError as e:
+            raise CommandError(f'Unknown {kind} in template: {e.args[0]}')
+
+    with open(path) as f:
+        entries = json.load(f)
+
+    return [{
+        'movies': resolve(entry.get('movies'), movies_by_key, 'movie'),
+        'theaters': resolve(entry.get('theaters'), theaters_by_key, 'theater'),
+        'times': [parse_time(t) for t in entry['times']] if 'times' in entry else times,
+        'price': Decimal(str(entry['price'])) if 'price' in entry else price,
+        'weekdays': entry.get('weekdays'),
+    } for entry in entries]
+
+
+def generate_shows(template, dates):
+    for entry in template:
+        for show_date in dates:
+            if entry['weekdays'] is not None and show_date.weekday() not in entry['weekdays']:
+                continue
+            for movie in entry['movies']:
+                for theater in entry['theaters']:
+                    for show_time in entry['times']:
+                        yield Show(
+                            movie_id=movie.id,
+                            theater_id=theater.id,
+                            show_date=show_date,
+                            show_time=show_time,
+                            price=entry['price'],
+                            available_seats=theater.capacity,
+                            runtime=show_runtime(movie.duration),
+                        )
+
+
+class Command(BaseCommand):
+    help = 'Create shows for a date range in bulk, skipping ones that overlap a show in the same theater'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, default=None,
+                            help='First show date (YYYY-MM-DD), default today')
+        parser.add_argument('--days', type=int, default=7, help='Number of days to schedule')
+        parser.add_argument('--template', help='JSON schedule template; default is a random demo schedule')
+        parser.add_argument('--times', default=','.join(DEFAULT_TIMES),
+                            help='Comma separated HH:MM show times for entries without their own')
+        parser.add_argument('--price', type=Decimal, default=Decimal(DEFAULT_PRICE))
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for the demo schedule')
+
+    def handle(self, *args, **options):
+        start = options['start'] or date.today()
+        dates = [start + timedelta(days=i) for i in range(options['days'])]
+        times = [parse_time(t) for t in options['times'].split(',') if t]
+
+        movies = list(Movie.objects.filter(is_active=True).only('id', 'title', 'duration'))
+        theaters = list(Theater.objects.only('id', 'name', 'capacity'))
+        if not movies or not theaters:
+            raise CommandError('Add movies and theaters before scheduling shows.')
+
+        if options['template']:
+            template = load_template(options['template'], movies, theaters, times, options['price'])
+        else:
+            template = random_template(movies, theaters, times, options['price'], random.Random(options['seed']))
+
+        before = Show.objects.count()
+        shows = generate_shows(template, dates)
+        skipped = 0
+        movie_ids = set()
+        with transaction.atomic():
+            # Existing shows included; an existing show clashes with itself, so reruns add nothing
+            index = ScheduleIndex.load(dates[0], dates[-1])
+            while True:
+                batch = list(islice(shows, options['batch_size']))
+                if not batch:
+                    break
+                free = [show for show in batch
+                        if index.add(show.theater_id, *slot(show.show_date, show.show_time, show.runtime))]
+                skipped += len(batch) - len(free)
+                movie_ids.update(show.movie_id for show in free)
+                Show.objects.bulk_create(free, ignore_conflicts=True)
+            record_offers(Show.objects.filter(show_date__range=(dates[0], dates[-1])))
+        created = Show.objects.count() - before
+
+        # bulk_create skips post_save, so record the new shows' seats offered
+        # above and invalidate cached catalogue pages and the showtimes grids
+        # of every movie scheduled here
+        bump_catalogue_version()
+        for movie_id in movie_ids:
+            invalidate_movie(movie_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Scheduled {created} new show(s) from {dates[0]} to {dates[-1]}, '
+            f'skipped {skipped} that overlap a show in the same theater'
+        ))
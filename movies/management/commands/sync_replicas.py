@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over each SQLite replica (local replica testing)'
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URLS.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in replicas:
+            replica = connections[alias]
+            if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+                raise CommandError(f'{alias}: only SQLite files can be copied; '
+                                   'other replicas are kept current by the database\'s own replication.')
+            primary.ensure_connection()
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f'Copied {primary.settings_dict["NAME"]} to {replica.settings_dict["NAME"]}')
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_booking_payment_date_booking_payment_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='seat_numbers',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='seat_map',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='seat_map_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
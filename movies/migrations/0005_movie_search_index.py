@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from movies.search import ensure_search_index
+
+
+def create_search_index(apps, schema_editor):
+    ensure_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for trigger in ['movies_movie_fts_ai', 'movies_movie_fts_ad', 'movies_movie_fts_au']:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute('DROP TABLE IF EXISTS movies_movie_fts')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS movies_movie_search_gin')
+            cursor.execute('ALTER TABLE movies_movie DROP COLUMN IF EXISTS search_document')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_booking_hold_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movie_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['show_date', 'show_time', 'id'], name='show_schedule_idx'),
+        ),
+    ]
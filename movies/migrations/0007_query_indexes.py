@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_show_schedule_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-booking_date'], name='booking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('payment_status__in', ['PENDING', 'FAILED'])), fields=['hold_expires_at'], name='booking_open_hold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_active', 'genre', '-release_date'], name='movie_active_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-release_date'], name='movie_active_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['movie', 'show_date', 'show_time'], name='show_movie_schedule_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='show',
+            constraint=models.CheckConstraint(check=models.Q(('available_seats__gte', 0)), name='show_available_seats_gte_0'),
+        ),
+    ]
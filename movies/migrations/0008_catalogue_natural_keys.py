@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='movie',
+            constraint=models.UniqueConstraint(fields=('title', 'release_date'), name='movie_title_release_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='theater',
+            constraint=models.UniqueConstraint(fields=('name', 'location'), name='theater_name_location_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_catalogue_natural_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='poster_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_booking_payment_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(blank=True, choices=[('CREDIT_CARD', 'Credit Card'), ('DEBIT_CARD', 'Debit Card'), ('UPI', 'UPI'), ('NET_BANKING', 'Net Banking'), ('WALLET', 'Wallet')], max_length=20)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('seats_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.movie')),
+                ('show', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.show')),
+                ('theater', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='movies.theater')),
+            ],
+            options={
+                'verbose_name_plural': 'daily sales',
+                'indexes': [models.Index(fields=['date', 'movie'], name='dailysales_date_movie_idx'), models.Index(fields=['date', 'theater'], name='dailysales_date_theater_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('show', 'payment_method'), name='dailysales_show_method_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_dailysales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='show',
+            name='base_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from movies.scheduling import drop_schedule_constraint, ensure_schedule_constraint
+
+
+def fill_runtimes(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    Show = apps.get_model('movies', 'Show')
+    duration = Movie.objects.filter(id=OuterRef('movie_id')).values('duration')[:1]
+    Show.objects.using(schema_editor.connection.alias).update(
+        runtime=Subquery(duration) + settings.SHOW_TURNAROUND_MINUTES
+    )
+
+
+def add_schedule_constraint(apps, schema_editor):
+    ensure_schedule_constraint(schema_editor.connection)
+
+
+def drop_constraint(apps, schema_editor):
+    drop_schedule_constraint(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='show',
+            name='runtime',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_runtimes, migrations.RunPython.noop),
+        migrations.RunPython(add_schedule_constraint, drop_constraint),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+from movies.seatmap import SeatMap
+
+SEAT_HOLDING_STATUSES = ['PENDING', 'PROCESSING', 'COMPLETED', 'FAILED']
+
+
+def backfill_seat_maps(apps, schema_editor):
+    """
+    Give every seat-holding booking seat numbers and mark them taken, then
+    take seats off sale until each show's seat map agrees with its count
+    """
+    Show = apps.get_model('movies', 'Show')
+    Booking = apps.get_model('movies', 'Booking')
+    db = schema_editor.connection.alias
+
+    shows = Show.objects.using(db).select_related('theater').order_by('id')
+    for show in shows.iterator():
+        seat_map = SeatMap(show.theater.capacity, show.seat_map)
+        bookings = list(
+            Booking.objects.using(db).filter(show_id=show.id, payment_status__in=SEAT_HOLDING_STATUSES)
+            .order_by('id')
+        )
+        for booking in bookings:
+            if booking.seat_numbers:
+                # Already claimed through the seat map; make sure they read as taken
+                seat_map.release(booking.seat_numbers)
+                seat_map.claim(booking.seat_numbers)
+            else:
+                booking.seat_numbers = seat_map.free_seats(limit=booking.seats_booked)
+                seat_map.claim(booking.seat_numbers)
+        Booking.objects.using(db).bulk_update(bookings, ['seat_numbers'])
+
+        surplus = seat_map.free_count - max(show.available_seats, 0)
+        if surplus > 0:
+            seat_map.claim_best(surplus)
+        Show.objects.using(db).filter(id=show.id).update(
+            seat_map=seat_map.to_bytes(), available_seats=seat_map.free_count,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0014_show_runtime'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seat_maps, migrations.RunPython.noop),
+    ]
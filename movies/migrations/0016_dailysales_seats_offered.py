@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+def backfill_offers(apps, schema_editor):
+    """Give every show an offer row carrying its theater's capacity"""
+    Show = apps.get_model('movies', 'Show')
+    DailySales = apps.get_model('movies', 'DailySales')
+    db = schema_editor.connection.alias
+
+    rows = [
+        DailySales(show_id=show_id, movie_id=movie_id, theater_id=theater_id, date=show_date,
+                   payment_method='', seats_offered=capacity)
+        for show_id, movie_id, theater_id, show_date, capacity in Show.objects.using(db).values_list(
+            'id', 'movie_id', 'theater_id', 'show_date', 'theater__capacity').iterator()
+    ]
+    DailySales.objects.using(db).bulk_create(rows, batch_size=1000, update_conflicts=True,
+                                             unique_fields=['show', 'payment_method'],
+                                             update_fields=['seats_offered'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_backfill_seat_maps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysales',
+            name='seats_offered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_offers, migrations.RunPython.noop),
+    ]
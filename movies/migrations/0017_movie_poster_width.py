@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from PIL import Image
+
+from movies.images import oriented_width
+
+
+def backfill_poster_widths(apps, schema_editor):
+    """
+    Read the width of every processed poster from its header; a poster that
+    can't be read shows the original until build_posters redoes it
+    """
+    Movie = apps.get_model('movies', 'Movie')
+    db = schema_editor.connection.alias
+
+    for movie in Movie.objects.using(db).exclude(poster_hash='').only('poster').iterator():
+        try:
+            with movie.poster.open('rb') as f, Image.open(f) as image:
+                width = oriented_width(image)
+        except Exception:
+            continue
+        Movie.objects.using(db).filter(id=movie.id).update(poster_width=width)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0016_dailysales_seats_offered'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='poster_width',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_poster_widths, migrations.RunPython.noop),
+    ]
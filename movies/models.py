@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 
+from .scheduling import ScheduleIndex, format_slot, show_runtime, slot
+
 class Movie(models.Model):
     GENRE_CHOICES = [
         ('ACTION', 'Action'),
@@ -20,6 +23,10 @@ class Movie(models.Model):
     duration = models.IntegerField(help_text="Duration in minutes")
     release_date = models.DateField()
     poster = models.ImageField(upload_to='movie_posters/', blank=True, null=True)
+    # Content hash of the poster once its resized derivatives exist, see movies.images
+    poster_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Width of the original poster in pixels, which caps the derivatives' widths
+    poster_width = models.PositiveIntegerField(default=0, editable=False)
     trailer_url = models.URLField(blank=True, null=True)
     rating = models.DecimalField(max_digits=3, decimal_places=1, validators=[MinValueValidator(0)], default=0)
     is_active = models.BooleanField(default=True)
@@ -28,6 +35,15 @@ class Movie(models.Model):
     
     class Meta:
         ordering = ['-release_date']
+        indexes = [
+            # Home page: active movies, optionally by genre, newest first
+            models.Index(fields=['is_active', 'genre', '-release_date'], name='movie_active_genre_idx'),
+            models.Index(fields=['-release_date'], condition=models.Q(is_active=True), name='movie_active_release_idx'),
+        ]
+        constraints = [
+            # Natural key used by import_catalogue upserts
+            models.UniqueConstraint(fields=['title', 'release_date'], name='movie_title_release_uniq'),
+        ]
     
     def __str__(self):
         return self.title
@@ -39,6 +55,12 @@ class Theater(models.Model):
     capacity = models.IntegerField()
     description = models.TextField(blank=True)
     
+    class Meta:
+        constraints = [
+            # Natural key used by import_catalogue upserts
+            models.UniqueConstraint(fields=['name', 'location'], name='theater_name_location_uniq'),
+        ]
+    
     def __str__(self):
         return f"{self.name} - {self.location}"
 
@@ -49,11 +71,45 @@ class Show(models.Model):
     show_date = models.DateField()
     show_time = models.TimeField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
+    # Price before demand adjustments (movies.pricing); empty means "price as set",
+    # and setting the price by hand (admin, import) empties it
+    base_price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     available_seats = models.IntegerField()
+    # Minutes the theater is busy (movie duration plus turnaround), set on save;
+    # shows created with bulk_create must set it themselves. See movies.scheduling
+    runtime = models.PositiveIntegerField(default=0, editable=False)
+    
+    # One bit per seat (1 = taken), see movies.seatmap
+    seat_map = models.BinaryField(default=bytes, editable=False)
+    seat_map_version = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['show_date', 'show_time']
         unique_together = ['movie', 'theater', 'show_date', 'show_time']
+        indexes = [
+            # Backs keyset pagination of the schedule in shows_list
+            models.Index(fields=['show_date', 'show_time', 'id'], name='show_schedule_idx'),
+            # movie_detail: one movie's shows in schedule order
+            models.Index(fields=['movie', 'show_date', 'show_time'], name='show_movie_schedule_idx'),
+        ]
+        constraints = [
+            # The upper bound (theater capacity) lives on another table, see clean()
+            models.CheckConstraint(check=models.Q(available_seats__gte=0), name='show_available_seats_gte_0'),
+        ]
+    
+    def clean(self):
+        errors = {}
+        if self.theater_id and self.available_seats is not None \
+                and self.available_seats > self.theater.capacity:
+            errors['available_seats'] = f'Cannot exceed theater capacity ({self.theater.capacity}).'
+        if self.theater_id and self.movie_id and self.show_date and self.show_time:
+            index = ScheduleIndex.load(self.show_date, self.show_date, theater_ids=[self.theater_id], exclude=self.pk)
+            clash = index.conflict(self.theater_id, *slot(self.show_date, self.show_time,
+                                                          show_runtime(self.movie.duration)))
+            if clash:
+                errors['show_time'] = f'{self.theater.name} is already busy {format_slot(*clash[:2])}.'
+        if errors:
+            raise ValidationError(errors)
     
     def __str__(self):
         return f"{self.movie.title} - {self.theater.name} - {self.show_date} {self.show_time}"
@@ -62,9 +118,11 @@ class Show(models.Model):
 class Booking(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
         ('COMPLETED', 'Completed'),
         ('FAILED', 'Failed'),
         ('REFUNDED', 'Refunded'),
+        ('EXPIRED', 'Expired'),
     ]
     
     PAYMENT_METHOD_CHOICES = [
@@ -77,18 +135,86 @@ class Booking(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     show = models.ForeignKey(Show, on_delete=models.CASCADE, related_name='bookings')
+    # Set when the booking was bought through the cart; the order is paid as a whole
+    order = models.ForeignKey('Order', on_delete=models.CASCADE, related_name='bookings', null=True, blank=True)
     seats_booked = models.IntegerField(validators=[MinValueValidator(1)])
     booking_date = models.DateTimeField(auto_now_add=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    seat_numbers = models.JSONField(default=list, blank=True)
     
     # Payment fields
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='PENDING')
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES, null=True, blank=True)
     payment_id = models.CharField(max_length=100, null=True, blank=True)
+    # Idempotency key of the latest payment attempt; a resubmit with the same key is a no-op
+    payment_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
     payment_date = models.DateTimeField(null=True, blank=True)
     
+    # Seats stay reserved until this time unless payment completes
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-booking_date']
+        indexes = [
+            # my_bookings: a user's history, newest first
+            models.Index(fields=['user', '-booking_date'], name='booking_user_date_idx'),
+            # Seat hold reaper only ever looks at unpaid bookings
+            models.Index(fields=['hold_expires_at'], condition=models.Q(payment_status__in=['PENDING', 'FAILED']),
+                         name='booking_open_hold_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.show.movie.title} - {self.seats_booked} seats"
+
+
+class Order(models.Model):
+    """
+    Several bookings checked out from the cart together and paid with a
+    single charge (see movies.services.checkout and movies.payments)
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    created_at = models.DateTimeField(auto_now_add=True)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    # Payment fields, mirrored onto the order's bookings as it settles
+    payment_status = models.CharField(max_length=20, choices=Booking.PAYMENT_STATUS_CHOICES, default='PENDING')
+    payment_method = models.CharField(max_length=20, choices=Booking.PAYMENT_METHOD_CHOICES, null=True, blank=True)
+    payment_id = models.CharField(max_length=100, null=True, blank=True)
+    payment_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
+    payment_date = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Order {self.id} - {self.user.username} - {self.payment_status}"
+
+
+class DailySales(models.Model):
+    """
+    Completed sales per show and payment method, keyed by the show's date.
+    Maintained by movies.analytics as payments settle. The blank payment
+    method row of each show also carries the seats it offers.
+    """
+    show = models.ForeignKey(Show, on_delete=models.CASCADE, related_name='+')
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    theater = models.ForeignKey(Theater, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    payment_method = models.CharField(max_length=20, choices=Booking.PAYMENT_METHOD_CHOICES, blank=True)
+    bookings = models.PositiveIntegerField(default=0)
+    seats_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    seats_offered = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'daily sales'
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'payment_method'], name='dailysales_show_method_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'movie'], name='dailysales_date_movie_idx'),
+            models.Index(fields=['date', 'theater'], name='dailysales_date_theater_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - show {self.show_id} - {self.payment_method}"
@@ -0,0 +1,119 @@
+"""
+Keyset (seek) pagination.
+
+Instead of OFFSET, each page starts strictly after the sort key of the
+previous page's last row, so page N costs the same index seek as page 1.
+The sort key must be unique, so it should end with the primary key.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _field_name(ordering):
+    return ordering.lstrip('-')
+
+
+def encode_cursor(obj, ordering):
+    values = []
+    for field in ordering:
+        value = getattr(obj, _field_name(field))
+        values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """Return the decoded key values, or None for a missing or bad cursor"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(_field_name(field)).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _after(ordering, values):
+    """Build ``(a, b, c) > (va, vb, vc)`` respecting each field's direction"""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        clause = Q(**{f'{_field_name(field)}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{_field_name(prev_field): prev_value})
+        condition |= clause
+    return condition
+
+
+class KeysetPage:
+    """
+    One page of results plus the cursor for the next page
+    """
+
+    def __init__(self, object_list, next_cursor, cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _seek(queryset, ordering, cursor):
+    values = decode_cursor(cursor, queryset.model, ordering)
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    return queryset, values is not None
+
+
+def _make_page(rows, ordering, page_size, cursor):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1], ordering)
+    return KeysetPage(rows, next_cursor, cursor)
+
+
+def page_queryset(queryset, ordering, cursor=None, page_size=24):
+    """
+    The query a page is read with; the bool says whether ``cursor`` was valid
+    """
+    queryset, valid = _seek(queryset, ordering, cursor)
+    # One extra row tells whether another page exists
+    return queryset[:page_size + 1], valid
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=24):
+    """
+    Return the page of ``queryset`` that follows ``cursor`` in ``ordering``
+    """
+    queryset, valid = page_queryset(queryset, ordering, cursor, page_size)
+    return _make_page(list(queryset), ordering, page_size, cursor if valid else None)
+
+
+async def akeyset_paginate(queryset, ordering, cursor=None, page_size=24):
+    """
+    Async version of keyset_paginate
+    """
+    queryset, valid = page_queryset(queryset, ordering, cursor, page_size)
+    rows = [row async for row in queryset]
+    return _make_page(rows, ordering, page_size, cursor if valid else None)
@@ -0,0 +1,112 @@
+"""
+In-process publish/subscribe for live seat availability.
+
+Code that changes a show's seat count calls ``seats_changed(show_id)``.
+After the transaction commits, the new count is read once and pushed to
+every subscriber of that show in this process, so thousands of open
+Server-Sent Events streams cost one query per change instead of one poll
+each. Subscribers only ever hold the latest value; a slow client skips
+intermediate counts instead of queueing them.
+"""
+import asyncio
+import queue
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Show
+from .showtimes import update_seat_counts
+
+
+class AsyncSubscriber:
+    """Subscriber consumed from an event loop (ASGI)"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=1)
+
+    def _offer(self, value):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(value)
+
+    def offer(self, value):
+        self.loop.call_soon_threadsafe(self._offer, value)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ThreadSubscriber:
+    """Subscriber consumed from a worker thread (WSGI)"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=1)
+        self.lock = threading.Lock()
+
+    def offer(self, value):
+        with self.lock:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(value)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SeatBroker:
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, show_id, subscriber):
+        with self.lock:
+            self.subscribers[show_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, show_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(show_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[show_id]
+
+    def has_subscribers(self, show_id):
+        return show_id in self.subscribers
+
+    def publish(self, show_id, available_seats):
+        with self.lock:
+            subscribers = list(self.subscribers.get(show_id, ()))
+        for subscriber in subscribers:
+            subscriber.offer(available_seats)
+
+
+broker = SeatBroker()
+
+
+def _publish_current(show_ids):
+    if not show_ids:
+        return
+    counts = list(Show.objects.filter(id__in=show_ids).values_list('id', 'movie_id', 'available_seats'))
+    update_seat_counts(counts)
+    for show_id, _, available_seats in counts:
+        if broker.has_subscribers(show_id):
+            broker.publish(show_id, available_seats)
+
+
+def seats_changed(*show_ids):
+    """
+    Announce new seat counts for ``show_ids`` once the current transaction
+    commits. One query covers both the showtimes grid and every listener.
+    """
+    transaction.on_commit(lambda: _publish_current(show_ids))
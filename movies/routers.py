@@ -0,0 +1,124 @@
+"""
+Read replica routing for catalogue pages.
+
+With DATABASE_REPLICA_URLS set, views wrapped in ``replica_reads`` (home,
+movie_detail, shows_list) read Movie, Show and Theater rows from one
+replica picked per request. Everything else stays on the primary: writes,
+reads of any other model (sessions, users, bookings), anything inside a
+transaction, and select_for_update, which Django routes as a write.
+
+A browser that has just POSTed something (a booking, payment, checkout)
+gets a short-lived cookie that pins its reads to the primary for
+REPLICA_PIN_SECONDS, so it never reads from a replica that hasn't caught
+up with its own write. Pages and showtime grids cached from a replica can
+trail the primary by the replication lag until they are next invalidated.
+
+Locally, point DATABASE_REPLICA_URLS at a second SQLite file and copy the
+primary into it with ``python manage.py sync_replicas``.
+"""
+import contextvars
+import functools
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_MODELS = {'movies.movie', 'movies.show', 'movies.theater'}
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_replica = contextvars.ContextVar('replica_alias', default=None)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def replica_reads(view):
+    """Serve the catalogue reads of ``view`` (sync or async) from a replica"""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = _replica.set(_pick_replica())
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = _replica.set(_pick_replica())
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _replica.reset(token)
+    return wrapper
+
+
+def _pick_replica():
+    aliases = replica_aliases()
+    if not aliases or _pinned.get():
+        return None
+    return random.choice(aliases)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or model._meta.label_lower not in REPLICA_MODELS:
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replica_aliases()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin a browser's reads to the primary for REPLICA_PIN_SECONDS after any
+    request that may have written
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,169 @@
+"""
+Screen scheduling: a theater shows one movie at a time.
+
+A show occupies its theater from its start for ``Show.runtime`` minutes
+(the movie's duration plus SHOW_TURNAROUND_MINUTES). ScheduleIndex keeps
+each theater's occupied slots sorted by start in plain lists; since slots
+never overlap, checking a new show only means comparing it with its two
+neighbours, found with one bisect, instead of scanning the theater's
+schedule. schedule_shows and import_catalogue use it to skip or reject
+clashing shows in bulk and Show.clean() to reject them in the admin.
+
+On PostgreSQL an exclusion constraint enforces the same rule for every
+writer. It is added by migration and re-tried after each migrate while
+older overlapping shows still block it.
+"""
+import bisect
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+SCHEDULE_CONSTRAINT = 'show_no_overlap'
+POSTGRES_CONSTRAINT = f"""
+    ALTER TABLE movies_show ADD CONSTRAINT {SCHEDULE_CONSTRAINT} EXCLUDE USING gist (
+        theater_id WITH =,
+        tsrange(show_date + show_time, show_date + show_time + runtime * interval '1 minute', '[)') WITH &&
+    )
+"""
+
+
+def show_runtime(duration):
+    """Minutes a movie of ``duration`` minutes keeps its screen busy"""
+    return duration + settings.SHOW_TURNAROUND_MINUTES
+
+
+def slot(show_date, show_time, runtime):
+    """A show's [start, end) in minutes on one timeline, so overnight shows compare correctly"""
+    start = show_date.toordinal() * MINUTES_PER_DAY + show_time.hour * 60 + show_time.minute
+    return start, start + runtime
+
+
+def format_slot(start, end):
+    day, minutes = divmod(start, MINUTES_PER_DAY)
+    return f'{date.fromordinal(day):%b %d} {minutes // 60:02d}:{minutes % 60:02d}-' \
+           f'{end % MINUTES_PER_DAY // 60:02d}:{end % 60:02d}'
+
+
+class ScheduleIndex:
+    """
+    Occupied slots per theater as parallel lists of starts, ends and show
+    ids, sorted by start.
+
+    Looking up a conflict is O(log n) in the theater's slots. Adding one
+    also shifts the tail of three lists (list.insert), which is O(n) but a
+    memmove; with at most a few thousand slots per theater in a scheduling
+    window it stays well below the cost of the lookup's Python code.
+    """
+
+    def __init__(self):
+        self.theaters = defaultdict(lambda: ([], [], []))
+
+    @classmethod
+    def load(cls, start_date, end_date, theater_ids=None, exclude=None, replacing=()):
+        """
+        Index the stored shows that could overlap shows dated
+        ``start_date``..``end_date``, leaving out show ``exclude`` and the
+        shows whose ``(movie_id, theater_id, show_date, show_time)`` is in
+        ``replacing`` (about to be rewritten)
+        """
+        from .models import Show
+
+        shows = Show.objects.filter(
+            show_date__range=(start_date - timedelta(days=1), end_date + timedelta(days=1))
+        )
+        if theater_ids is not None:
+            shows = shows.filter(theater_id__in=theater_ids)
+        if exclude is not None:
+            shows = shows.exclude(id=exclude)
+        index = cls()
+        rows = shows.order_by('theater_id', 'show_date', 'show_time').values_list(
+            'id', 'movie_id', 'theater_id', 'show_date', 'show_time', 'runtime')
+        for show_id, movie_id, theater_id, show_date, show_time, runtime in rows.iterator():
+            if (movie_id, theater_id, show_date, show_time) not in replacing:
+                index._append(theater_id, *slot(show_date, show_time, runtime), show_id)
+        return index
+
+    def _append(self, theater_id, start, end, show_id):
+        starts, ends, ids = self.theaters[theater_id]
+        if starts and ends[-1] > start:
+            # Shows stored before the rule existed can overlap; treat them as one slot
+            ends[-1] = max(ends[-1], end)
+            return
+        starts.append(start)
+        ends.append(end)
+        ids.append(show_id)
+
+    def conflict(self, theater_id, start, end):
+        """The ``(start, end, show_id)`` of a slot overlapping [start, end), or None"""
+        if theater_id not in self.theaters:
+            return None
+        starts, ends, ids = self.theaters[theater_id]
+        i = bisect.bisect_right(starts, start)
+        if i and ends[i - 1] > start:
+            return starts[i - 1], ends[i - 1], ids[i - 1]
+        if i < len(starts) and starts[i] < end:
+            return starts[i], ends[i], ids[i]
+        return None
+
+    def add(self, theater_id, start, end, show_id=None):
+        """Occupy [start, end) unless it overlaps; returns whether it was added"""
+        if self.conflict(theater_id, start, end):
+            return False
+        starts, ends, ids = self.theaters[theater_id]
+        i = bisect.bisect_right(starts, start)
+        starts.insert(i, start)
+        ends.insert(i, end)
+        ids.insert(i, show_id)
+        return True
+
+
+def count_overlaps():
+    """Number of stored shows that start before the previous show in their theater ends"""
+    from .models import Show
+
+    overlaps = 0
+    previous_theater, previous_end = None, None
+    rows = Show.objects.order_by('theater_id', 'show_date', 'show_time').values_list(
+        'theater_id', 'show_date', 'show_time', 'runtime')
+    for theater_id, show_date, show_time, runtime in rows.iterator():
+        start, end = slot(show_date, show_time, runtime)
+        if theater_id == previous_theater and start < previous_end:
+            overlaps += 1
+            end = max(end, previous_end)
+        previous_theater, previous_end = theater_id, end
+    return overlaps
+
+
+def ensure_schedule_constraint(conn):
+    """
+    Add the PostgreSQL exclusion constraint if it is missing. Returns False,
+    leaving the table as it was, while stored shows still overlap.
+    """
+    if conn.vendor != 'postgresql':
+        return True
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_constraint WHERE conname = %s', [SCHEDULE_CONSTRAINT])
+        if cursor.fetchone():
+            return True
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    try:
+        with transaction.atomic(using=conn.alias):
+            with conn.cursor() as cursor:
+                cursor.execute(POSTGRES_CONSTRAINT)
+    except IntegrityError:
+        logger.warning('%s: %d shows overlap another show in their theater; move or delete them and '
+                       'run migrate again to add the constraint', SCHEDULE_CONSTRAINT, count_overlaps())
+        return False
+    return True
+
+
+def drop_schedule_constraint(conn):
+    if conn.vendor == 'postgresql':
+        with conn.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE movies_show DROP CONSTRAINT IF EXISTS {SCHEDULE_CONSTRAINT}')
@@ -0,0 +1,153 @@
+"""
+Full-text movie search.
+
+SQLite keeps an FTS5 index (``movies_movie_fts``) in step with
+``movies_movie`` through triggers. PostgreSQL uses a generated tsvector
+column with a GIN index. Both give ranked, prefix-matching results without
+scanning every description. Other databases fall back to ``icontains``.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Case, IntegerField, Q, When
+
+SEARCH_LIMIT = 200
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_movie_fts USING fts5(
+        title, description, genre,
+        content='movies_movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_ai AFTER INSERT ON movies_movie BEGIN
+        INSERT INTO movies_movie_fts(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_ad AFTER DELETE ON movies_movie BEGIN
+        INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_au AFTER UPDATE OF title, description, genre ON movies_movie BEGIN
+        INSERT INTO movies_movie_fts(movies_movie_fts, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+        INSERT INTO movies_movie_fts(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    """
+    ALTER TABLE movies_movie ADD COLUMN IF NOT EXISTS search_document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(genre, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS movies_movie_search_gin ON movies_movie USING gin (search_document)",
+]
+
+
+def ensure_search_index(using_connection=None):
+    """
+    Create the search index and its sync machinery if missing.
+
+    Safe to run repeatedly; SQLite table rebuilds during migrations drop
+    triggers, so this also runs after every migrate.
+    """
+    conn = using_connection or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'movies_movie_fts'")
+            created = cursor.fetchone() is None
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+            if created:
+                cursor.execute("INSERT INTO movies_movie_fts(movies_movie_fts) VALUES ('rebuild')")
+        elif conn.vendor == 'postgresql':
+            for statement in POSTGRES_SCHEMA:
+                cursor.execute(statement)
+
+
+def rebuild_search_index(using_connection=None):
+    """Re-index every movie from scratch"""
+    conn = using_connection or connection
+    if conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO movies_movie_fts(movies_movie_fts) VALUES ('rebuild')")
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_movie_ids(query, limit=SEARCH_LIMIT, using=DEFAULT_DB_ALIAS, active_only=True, genre=None):
+    """
+    Return ids of movies matching every word of ``query`` as a prefix,
+    best match first, or None if the database has no full-text index.
+    The active and genre filters are applied before the limit, so a
+    common term never crowds out the matches a filtered page wants.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    filters, filter_params = '', []
+    if active_only:
+        filters += ' AND m.is_active = %s'
+        filter_params.append(True)
+    if genre:
+        filters += ' AND m.genre = %s'
+        filter_params.append(genre)
+
+    conn = connections[using]
+    if conn.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        sql = (
+            "SELECT m.id FROM movies_movie_fts JOIN movies_movie m ON m.id = movies_movie_fts.rowid "
+            f"WHERE movies_movie_fts MATCH %s{filters} "
+            "ORDER BY bm25(movies_movie_fts, 10.0, 1.0, 5.0) LIMIT %s"
+        )
+        params = [match, *filter_params, limit]
+    elif conn.vendor == 'postgresql':
+        sql = (
+            f"SELECT m.id FROM movies_movie m WHERE m.search_document @@ to_tsquery('english', %s){filters} "
+            "ORDER BY ts_rank(m.search_document, to_tsquery('english', %s)) DESC LIMIT %s"
+        )
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        params = [tsquery, *filter_params, tsquery, limit]
+    else:
+        return None
+
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_movies(queryset, query, active_only=True, genre=None):
+    """
+    Narrow a Movie queryset to ``query`` matches, ordered by relevance.
+    Pass the queryset's own active and genre filters so the index applies
+    them before its limit.
+    """
+    # Same database as the queryset, which may be a replica
+    ids = search_movie_ids(query, using=queryset.db, active_only=active_only, genre=genre)
+    if ids is None:
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(genre__icontains=query)
+        )
+    if not ids:
+        return queryset.none()
+    relevance = Case(*[When(id=movie_id, then=rank) for rank, movie_id in enumerate(ids)],
+                     output_field=IntegerField())
+    return queryset.filter(id__in=ids).order_by(relevance)
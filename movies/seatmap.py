@@ -0,0 +1,185 @@
+"""
+Per-seat inventory for shows.
+
+Each Show stores a compact bitmap with one bit per seat (1 = taken), sized
+from the theater capacity. The bitmap is the source of truth:
+``Show.available_seats`` is its free count, written by the same UPDATE.
+Seats are claimed with an optimistic compare-and-set on
+``Show.seat_map_version`` so buyers never wait on a row lock. The version
+covers the whole map, so any concurrent write to the show loses the race;
+the loser re-reads the map and re-applies its own change to it (merging
+with the winner's seats) after a short jittered backoff, so a burst of
+buyers spreads out instead of colliding again.
+"""
+import random
+import time
+
+from django.db.models import F
+
+from .models import Show
+
+
+class SeatUnavailable(Exception):
+    """Raised when a requested seat is taken or out of range, or too few seats are free"""
+
+    def __init__(self, seats, free_count):
+        self.seats = sorted(seats)
+        self.free_count = free_count
+        if self.seats:
+            super().__init__(f"Seats not available: {', '.join(map(str, self.seats))}")
+        else:
+            super().__init__(f"Only {free_count} seats available")
+
+
+# Seconds; attempt n sleeps up to RETRY_BACKOFF * 2**n, capped at RETRY_BACKOFF_MAX
+RETRY_BACKOFF = 0.005
+RETRY_BACKOFF_MAX = 0.2
+MAX_RETRIES = 10
+
+
+class SeatMapConflict(Exception):
+    """Raised when a claim keeps losing the compare-and-set race"""
+
+
+class SeatMap:
+    """
+    Fixed-size bitmap of seats numbered 1..capacity
+    """
+
+    def __init__(self, capacity, data=b''):
+        self.capacity = capacity
+        size = (capacity + 7) // 8
+        self.bits = bytearray(bytes(data or b'')[:size]).ljust(size, b'\0')
+
+    @classmethod
+    def for_show(cls, show):
+        return cls(show.theater.capacity, show.seat_map)
+
+    @classmethod
+    def with_taken(cls, capacity, count):
+        """A bitmap with seats 1..count taken, for shows that start with fewer free seats"""
+        seat_map = cls(capacity)
+        seat_map.claim(range(1, min(max(count, 0), capacity) + 1))
+        return seat_map
+
+    def _locate(self, seat):
+        index = seat - 1
+        return index >> 3, 1 << (index & 7)
+
+    def is_taken(self, seat):
+        byte, mask = self._locate(seat)
+        return bool(self.bits[byte] & mask)
+
+    def _validate(self, seats):
+        return {seat for seat in seats if not 1 <= seat <= self.capacity}
+
+    def claim(self, seats):
+        """Mark seats as taken, all or nothing"""
+        seats = set(seats)
+        invalid = self._validate(seats)
+        bad = invalid | {seat for seat in seats - invalid if self.is_taken(seat)}
+        if bad:
+            raise SeatUnavailable(bad, self.free_count)
+        for seat in seats:
+            byte, mask = self._locate(seat)
+            self.bits[byte] |= mask
+        return len(seats)
+
+    def claim_best(self, count):
+        """Claim the ``count`` lowest-numbered free seats and return them"""
+        seats = self.free_seats(limit=count)
+        if len(seats) < count:
+            raise SeatUnavailable([], len(seats))
+        self.claim(seats)
+        return seats
+
+    def release(self, seats):
+        """Mark seats as free again, returning how many were actually taken"""
+        seats = set(seats)
+        freed = 0
+        for seat in seats - self._validate(seats):
+            if self.is_taken(seat):
+                byte, mask = self._locate(seat)
+                self.bits[byte] &= ~mask
+                freed += 1
+        return freed
+
+    @property
+    def taken_count(self):
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+    @property
+    def free_count(self):
+        return self.capacity - self.taken_count
+
+    def free_seats(self, limit=None):
+        """Return free seat numbers in ascending order"""
+        seats = []
+        for seat in range(1, self.capacity + 1):
+            if not self.is_taken(seat):
+                seats.append(seat)
+                if limit is not None and len(seats) >= limit:
+                    break
+        return seats
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+def update_seat_map(show_id, change, show=None, max_retries=MAX_RETRIES):
+    """
+    Read the bitmap, apply ``change`` and write it back, with the free-seat
+    count derived from it, only if nobody else has written in between.
+    ``show`` may carry a bitmap the caller already loaded (with its version
+    and theater capacity) for the first attempt. Returns what ``change``
+    returns. The caller announces the new count with seats_changed.
+    """
+    for attempt in range(max_retries):
+        if attempt:
+            time.sleep(random.uniform(0, min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX)))
+        if show is None:
+            show = Show.objects.select_related('theater').only(
+                'seat_map', 'seat_map_version', 'theater__capacity'
+            ).get(id=show_id)
+        seat_map = SeatMap.for_show(show)
+        result = change(seat_map)
+        updated = Show.objects.filter(
+            id=show_id, seat_map_version=show.seat_map_version
+        ).update(
+            seat_map=seat_map.to_bytes(),
+            seat_map_version=F('seat_map_version') + 1,
+            available_seats=seat_map.free_count,
+        )
+        if updated:
+            return result
+        show = None
+    raise SeatMapConflict(f"Could not update seat map for show {show_id}")
+
+
+def claim_seats(show_id, seat_numbers=None, count=None, show=None, max_retries=MAX_RETRIES):
+    """
+    Atomically claim ``seat_numbers``, or the ``count`` lowest-numbered free
+    seats, for a show and return the claimed seat numbers.
+
+    Raises SeatUnavailable if a seat is taken or too few are free,
+    SeatMapConflict if the compare-and-set keeps losing to concurrent writers.
+    """
+    if seat_numbers is not None:
+        seat_numbers = sorted(set(seat_numbers))
+
+        def change(seat_map):
+            seat_map.claim(seat_numbers)
+            return seat_numbers
+    else:
+        def change(seat_map):
+            return seat_map.claim_best(count)
+
+    return update_seat_map(show_id, change, show, max_retries)
+
+
+def release_seats(show_id, seat_numbers, show=None, max_retries=MAX_RETRIES):
+    """
+    Atomically give specific seats back to a show, returning how many were taken
+    """
+    seat_numbers = set(seat_numbers)
+    return update_seat_map(show_id, lambda seat_map: seat_map.release(seat_numbers), show, max_retries)
@@ -0,0 +1,100 @@
+"""
+Booking services shared by the views and background jobs.
+"""
+from django.db import transaction
+
+from .cache import bookings_changed
+from .holds import hold_expiry
+from .models import Booking, Order, Show
+from .pubsub import seats_changed
+from .seatmap import SeatUnavailable, claim_seats
+
+
+class SeatsUnavailable(Exception):
+    """Raised when a show no longer has enough free seats"""
+
+    def __init__(self, available_seats, show_id=None):
+        self.available_seats = available_seats
+        self.show_id = show_id
+        super().__init__(f"Only {available_seats} seats available")
+
+
+def reserve_seats(user, show, seats_requested, seat_numbers=None):
+    """
+    Reserve seats on ``show`` and create a pending booking.
+
+    The seats (``seat_numbers``, or the lowest-numbered free ones) are
+    claimed with one compare-and-set UPDATE of the show's seat map, starting
+    from the map already loaded on ``show``, so no row lock is held across
+    reads and an uncontended reservation is two statements: the UPDATE and
+    the booking INSERT. The price is the one the buyer saw on ``show``.
+    """
+    with transaction.atomic():
+        try:
+            seats = claim_seats(show.id, seat_numbers, seats_requested, show=show)
+        except SeatUnavailable as e:
+            raise SeatsUnavailable(e.free_count, show.id)
+
+        seats_changed(show.id)
+        return Booking.objects.create(
+            user=user,
+            show=show,
+            seats_booked=len(seats),
+            seat_numbers=seats,
+            total_price=seats_requested * show.price,
+            payment_status='PENDING',
+            hold_expires_at=hold_expiry(),
+        )
+
+
+def checkout(user, items):
+    """
+    Reserve seats on every show in ``items`` ({show_id: seats}) and create
+    one pending order holding a booking per show, all in one transaction.
+
+    The shows are locked in id order, so checkouts sharing shows queue up
+    instead of deadlocking, and each show costs one seat-map UPDATE. The
+    order and its bookings are two INSERTs however many shows are bought.
+    Raises SeatsUnavailable for the first show that can't be filled, with
+    nothing reserved.
+    """
+    show_ids = sorted(items)
+    with transaction.atomic():
+        shows = list(
+            Show.objects.select_for_update(of=('self',)).select_related('theater').filter(id__in=show_ids)
+            .order_by('id').only('id', 'price', 'seat_map', 'seat_map_version', 'theater__capacity')
+        )
+        if len(shows) != len(show_ids):
+            missing = sorted(set(show_ids) - {show.id for show in shows})[0]
+            raise SeatsUnavailable(0, missing)
+
+        seats = {}
+        for show in shows:
+            try:
+                seats[show.id] = claim_seats(show.id, count=items[show.id], show=show)
+            except SeatUnavailable as e:
+                raise SeatsUnavailable(e.free_count, show.id)
+
+        order = Order.objects.create(
+            user=user,
+            total_price=sum(items[show.id] * show.price for show in shows),
+            payment_status='PENDING',
+        )
+        hold_expires_at = hold_expiry()
+        Booking.objects.bulk_create([
+            Booking(
+                user=user,
+                show=show,
+                order=order,
+                seats_booked=items[show.id],
+                seat_numbers=seats[show.id],
+                total_price=items[show.id] * show.price,
+                payment_status='PENDING',
+                hold_expires_at=hold_expires_at,
+            )
+            for show in shows
+        ])
+        seats_changed(*show_ids)
+        # bulk_create skips the post_save signal
+        bookings_changed(user.id)
+    return order
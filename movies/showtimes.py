@@ -0,0 +1,127 @@
+"""
+Denormalized showtimes grid for movie_detail.
+
+Each movie's shows are kept in the cache as one compact JSON blob, grouped
+by date and theater with prices and seat counts, so the detail page is a
+single key lookup instead of a join over the growing show table. Saving
+or deleting a Show patches just that entry (see movies.signals), seat
+count changes are patched from movies.pubsub, and a timeout bounds how
+long a lost concurrent patch can linger.
+"""
+import json
+from datetime import date, time
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache import get_cache
+from .models import Show
+
+
+def grid_key(movie_id):
+    return f'showtimes:{movie_id}'
+
+
+def _sort_key(row):
+    return row['date'], row['theater'], row['time'], row['id']
+
+
+def _row(show_id, show_date, show_time, price, seats, theater_id, theater, location):
+    return {'id': show_id, 'date': show_date, 'time': show_time, 'price': price, 'seats': seats,
+            'theater_id': theater_id, 'theater': theater, 'location': location}
+
+
+def _store(movie_id, rows):
+    rows.sort(key=_sort_key)
+    blob = json.dumps(rows, cls=DjangoJSONEncoder, separators=(',', ':'))
+    get_cache().set(grid_key(movie_id), blob, settings.SHOWTIMES_CACHE_TIMEOUT)
+
+
+def _load_rows(movie_id):
+    blob = get_cache().get(grid_key(movie_id))
+    return None if blob is None else json.loads(blob)
+
+
+def grid_rows(movie_id):
+    """The query a movie's grid is built from"""
+    return Show.objects.filter(movie_id=movie_id).values_list(
+        'id', 'show_date', 'show_time', 'price', 'available_seats',
+        'theater_id', 'theater__name', 'theater__location',
+    )
+
+
+def build_grid(movie_id):
+    """Rebuild a movie's grid from the database and return its rows"""
+    rows = [_row(*values) for values in grid_rows(movie_id)]
+    _store(movie_id, rows)
+    # Round-trip so callers always see the serialized form
+    return json.loads(json.dumps(rows, cls=DjangoJSONEncoder))
+
+
+def get_showtimes(movie_id):
+    """
+    Return the grid as ``[{'date', 'theaters': [{'name', 'location', 'shows'}]}]``
+    """
+    rows = _load_rows(movie_id)
+    if rows is None:
+        rows = build_grid(movie_id)
+
+    grid = []
+    for show_date, day_rows in groupby(rows, key=lambda row: row['date']):
+        theaters = []
+        for _, theater_rows in groupby(day_rows, key=lambda row: (row['theater'], row['theater_id'])):
+            theater_rows = list(theater_rows)
+            theaters.append({
+                'name': theater_rows[0]['theater'],
+                'location': theater_rows[0]['location'],
+                'shows': [{
+                    'id': row['id'],
+                    'show_date': date.fromisoformat(row['date']),
+                    'show_time': time.fromisoformat(row['time']),
+                    'price': Decimal(row['price']),
+                    'available_seats': row['seats'],
+                } for row in theater_rows],
+            })
+        grid.append({'date': date.fromisoformat(show_date), 'theaters': theaters})
+    return grid
+
+
+def update_show(show):
+    """Patch one show's entry after it was saved"""
+    rows = _load_rows(show.movie_id)
+    if rows is None:
+        return
+    rows = [row for row in rows if row['id'] != show.id]
+    theater = show.theater
+    rows.append(json.loads(json.dumps(_row(
+        show.id, show.show_date, show.show_time, show.price, show.available_seats,
+        theater.id, theater.name, theater.location,
+    ), cls=DjangoJSONEncoder)))
+    _store(show.movie_id, rows)
+
+
+def remove_show(movie_id, show_id):
+    rows = _load_rows(movie_id)
+    if rows is not None:
+        _store(movie_id, [row for row in rows if row['id'] != show_id])
+
+
+def update_seat_counts(counts):
+    """Patch seat counts from ``(show_id, movie_id, available_seats)`` tuples"""
+    by_movie = {}
+    for show_id, movie_id, available_seats in counts:
+        by_movie.setdefault(movie_id, {})[show_id] = available_seats
+    for movie_id, seats in by_movie.items():
+        rows = _load_rows(movie_id)
+        if rows is None:
+            continue
+        for row in rows:
+            if row['id'] in seats:
+                row['seats'] = seats[row['id']]
+        _store(movie_id, rows)
+
+
+def invalidate_movie(movie_id):
+    get_cache().delete(grid_key(movie_id))
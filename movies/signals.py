@@ -0,0 +1,160 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import record_offers
+from .auth import invalidate_user
+from .cache import bookings_changed, catalogue_changed
+from .models import Booking, DailySales, Movie, Show, Theater
+from .images import schedule_poster
+from .scheduling import ensure_schedule_constraint, show_runtime
+from .search import ensure_search_index
+from .seatmap import SeatMap
+from .showtimes import invalidate_movie, remove_show, update_show
+
+
+@receiver([post_save, post_delete], sender=Movie)
+@receiver([post_save, post_delete], sender=Show)
+@receiver([post_save, post_delete], sender=Theater)
+def invalidate_catalogue(sender, **kwargs):
+    """
+    Any catalogue change makes cached pages unreachable; not before it
+    commits, or a request could cache the old rows under the new version
+    """
+    catalogue_changed()
+
+
+@receiver(pre_save, sender=Show)
+def load_previous_show(sender, instance, **kwargs):
+    """The stored price and movie of a show about to be updated, for the receivers below"""
+    instance._previous = None if instance._state.adding else \
+        Show.objects.filter(pk=instance.pk).values('price', 'movie_id').first()
+
+
+@receiver(post_save, sender=Show)
+def patch_showtimes(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if previous and previous['movie_id'] != instance.movie_id:
+        # Moved to another movie: take it off the old movie's grid too
+        old_movie_id, show_id = previous['movie_id'], instance.pk
+        transaction.on_commit(lambda: remove_show(old_movie_id, show_id))
+    transaction.on_commit(lambda: update_show(instance))
+
+
+@receiver(post_save, sender=Show)
+def move_sales(sender, instance, created, **kwargs):
+    """Keep the sales rollup's copy of the show's date, movie and theater current"""
+    if not created:
+        DailySales.objects.filter(show=instance).exclude(
+            date=instance.show_date, movie_id=instance.movie_id, theater_id=instance.theater_id,
+        ).update(date=instance.show_date, movie_id=instance.movie_id, theater_id=instance.theater_id)
+
+
+@receiver(post_save, sender=Show)
+def offer_seats(sender, instance, **kwargs):
+    """A new show, or one moved to another theater, offers that theater's seats"""
+    record_offers(Show.objects.filter(id=instance.id))
+
+
+@receiver(post_delete, sender=Show)
+def drop_showtime(sender, instance, **kwargs):
+    movie_id, show_id = instance.movie_id, instance.pk
+    transaction.on_commit(lambda: remove_show(movie_id, show_id))
+
+
+@receiver(post_save, sender=Theater)
+def refresh_theater_showtimes(sender, instance, created, **kwargs):
+    """A renamed or moved theater shows up in every grid it plays in"""
+    if created:
+        return
+    movie_ids = set(Show.objects.filter(theater=instance).values_list('movie_id', flat=True))
+    transaction.on_commit(lambda: [invalidate_movie(movie_id) for movie_id in movie_ids])
+
+
+@receiver(post_save, sender=Theater)
+def resize_offers(sender, instance, created, **kwargs):
+    """A theater's shows offer its current capacity"""
+    if not created:
+        DailySales.objects.filter(theater=instance, payment_method='').exclude(
+            seats_offered=instance.capacity).update(seats_offered=instance.capacity)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_booking_sections(sender, instance, **kwargs):
+    bookings_changed(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs):
+    """Logins, password changes and deactivation all save the user"""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, app_config=None, using='default', **kwargs):
+    """SQLite table rebuilds drop the FTS triggers, so put them back"""
+    connection = connections[using]
+    if app_config is not None and app_config.label == 'movies' \
+            and Movie._meta.db_table in connection.introspection.table_names():
+        ensure_search_index(connection)
+        # Retried until older overlapping shows no longer block it
+        ensure_schedule_constraint(connection)
+
+
+@receiver(pre_save, sender=Show)
+def build_seat_map(sender, instance, **kwargs):
+    """A new show's seat map takes seats 1.. off sale to match the count it was given"""
+    if instance._state.adding and not instance.seat_map and instance.theater_id:
+        capacity = instance.theater.capacity
+        seat_map = SeatMap.with_taken(capacity, capacity - instance.available_seats)
+        instance.seat_map = seat_map.to_bytes()
+        instance.available_seats = seat_map.free_count
+
+
+@receiver(pre_save, sender=Show)
+def set_runtime(sender, instance, **kwargs):
+    if instance.movie_id:
+        instance.runtime = show_runtime(instance.movie.duration)
+
+
+@receiver(pre_save, sender=Show)
+def reset_base_price(sender, instance, update_fields=None, **kwargs):
+    """A price set by hand is the new base the repricer works from"""
+    if instance._state.adding or instance.base_price is None:
+        return
+    if update_fields is None or 'price' in update_fields:
+        if instance._previous and instance._previous['price'] != instance.price:
+            instance.base_price = None
+
+
+@receiver(post_save, sender=Movie)
+def update_show_runtimes(sender, instance, created, **kwargs):
+    """A changed duration moves the end of the movie's upcoming shows"""
+    if not created:
+        runtime = show_runtime(instance.duration)
+        Show.objects.filter(movie=instance, show_date__gte=date.today()).exclude(runtime=runtime) \
+            .update(runtime=runtime)
+
+
+@receiver(pre_save, sender=Movie)
+def detect_poster_change(sender, instance, **kwargs):
+    """Forget the old derivatives when a different poster is uploaded"""
+    if not instance.poster:
+        instance.poster_hash, instance.poster_width = '', 0
+        return
+    if instance.pk:
+        old_poster = Movie.objects.filter(pk=instance.pk).values_list('poster', flat=True).first()
+        if old_poster == instance.poster.name and instance.poster_hash:
+            return
+    instance.poster_hash, instance.poster_width = '', 0
+    instance._poster_changed = True
+
+
+@receiver(post_save, sender=Movie)
+def build_poster_derivatives(sender, instance, **kwargs):
+    if getattr(instance, '_poster_changed', False):
+        instance._poster_changed = False
+        transaction.on_commit(lambda: schedule_poster(instance.pk))
@@ -0,0 +1,37 @@
+import posixpath
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def stylesheet_bundle(bundle):
+    """
+    <link> to a STATIC_BUNDLES bundle built by collectstatic, or to each of
+    its source files under DEBUG where nothing has been built.
+    """
+    names = settings.STATIC_BUNDLES[bundle] if settings.DEBUG else [bundle]
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(name),) for name in names))
+
+
+@register.simple_tag
+def static_picture(name, alt='', css_class=''):
+    """
+    <picture> for a static image with the WebP copy collectstatic made next
+    to it, or a plain <img> when there is none.
+    """
+    webp = posixpath.splitext(name)[0] + '.webp'
+    img = format_html('<img src="{}" alt="{}" class="{}">', static(name), alt, css_class)
+    if settings.DEBUG or posixpath.dirname(name) not in settings.STATIC_IMAGE_WIDTHS:
+        return img
+    try:
+        webp_url = staticfiles_storage.url(webp)
+    except ValueError:
+        # Not in the manifest: Pillow couldn't read the original
+        return img
+    return format_html('<picture><source type="image/webp" srcset="{}">{}</picture>', webp_url, img)
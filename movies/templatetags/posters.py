@@ -0,0 +1,29 @@
+from django import template
+from django.utils.html import format_html
+
+from django.core.files.storage import default_storage
+
+from movies.images import derivative_name, derivative_widths, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def poster_image(movie, css_class='', style='', sizes='300px'):
+    """
+    Responsive <picture> for a movie poster: WebP with a JPEG fallback at
+    the widths actually built, or the original upload until they are ready.
+    """
+    if not movie.poster_hash or not movie.poster_width:
+        return format_html('<img src="{}" class="{}" alt="{}" style="{}" loading="lazy">',
+                           movie.poster.url, css_class, movie.title, style)
+    fallback_width = min(320, derivative_widths(movie.poster_width)[-1][0])
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" style="{}" loading="lazy">'
+        '</picture>',
+        srcset(movie.poster_hash, movie.poster_width, 'webp'), sizes,
+        default_storage.url(derivative_name(movie.poster_hash, fallback_width, 'jpg')),
+        srcset(movie.poster_hash, movie.poster_width, 'jpg'), sizes, css_class, movie.title, style,
+    )
@@ -0,0 +1,516 @@
+import base64
+import json
+import os
+import re
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import get_cache
+from .instrumentation import QueryBudgetExceeded
+from .models import Booking, Movie, Order, Show, Theater
+from .holds import expire_stale_holds
+from .pagination import keyset_paginate, page_queryset
+from .payments import FakeGateway, start_payment
+from .search import search_movie_ids
+from .seatmap import SeatMap, SeatMapConflict, SeatUnavailable, claim_seats, update_seat_map
+from .services import SeatsUnavailable, checkout, reserve_seats
+from .showtimes import grid_rows
+from .views import (MY_BOOKINGS_ORDERING, MY_BOOKINGS_PAGE_SIZE, MY_BOOKINGS_SECTIONS, SHOWS_ORDERING,
+                    SHOWS_PAGE_SIZE, catalogue_movies, section_bookings, upcoming_shows)
+
+
+def full_scan(plan, table):
+    """True if the plan reads every row of ``table`` without an index"""
+    if connection.vendor == 'postgresql':
+        return re.search(rf'Seq Scan on {table}\b', plan) is not None
+    # SQLite: "SCAN table" without "USING ... INDEX" is a full table scan
+    return any(
+        re.search(rf'\bSCAN {table}\b', line) and 'INDEX' not in line
+        for line in plan.splitlines()
+    )
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the queries the hot views run, built by the views' own code,
+    and fail when one reads a whole table
+    """
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables make the planner prefer seq scans; ask whether an index *can* be used
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        self.assertFalse(full_scan(plan, table), f'Full scan of {table}:\n{plan}')
+
+    def test_home(self):
+        self.assertUsesIndex(catalogue_movies('', ''))
+        self.assertUsesIndex(catalogue_movies('', 'ACTION'))
+
+    def test_movie_detail_showtimes(self):
+        self.assertUsesIndex(grid_rows(1))
+
+    def test_shows_list(self):
+        for params in ['', 'movie=1', f'date={date.today().isoformat()}']:
+            with self.subTest(params=params):
+                shows, _ = upcoming_shows(QueryDict(params))
+                self.assertUsesIndex(page_queryset(shows, SHOWS_ORDERING, page_size=SHOWS_PAGE_SIZE)[0])
+
+    def test_my_bookings(self):
+        for section in MY_BOOKINGS_SECTIONS:
+            with self.subTest(section=section):
+                bookings = section_bookings(1, section, timezone.localdate())
+                self.assertUsesIndex(page_queryset(bookings, MY_BOOKINGS_ORDERING, page_size=MY_BOOKINGS_PAGE_SIZE)[0])
+
+
+def create_show(movie, theater, days=1, at=time(18, 0), price=250, **fields):
+    """A show ``days`` from today, with every seat free unless ``available_seats`` says otherwise"""
+    fields.setdefault('available_seats', theater.capacity)
+    return Show.objects.create(movie=movie, theater=theater, show_date=timezone.localdate() + timedelta(days=days),
+                               show_time=at, price=price, **fields)
+
+
+# Pages render without a collectstatic manifest
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class CatalogueTestCase(TestCase):
+    """A movie, a theater and two upcoming shows of it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer', password='buyer-pass-4821')
+        cls.movie = Movie.objects.create(title='Jawan', description='A jailer on a mission', genre='ACTION',
+                                         duration=120, release_date=date(2023, 9, 7))
+        cls.theater = Theater.objects.create(name='PVR Phoenix', location='Mumbai', capacity=20)
+        cls.show = create_show(cls.movie, cls.theater)
+        cls.other_show = create_show(cls.movie, cls.theater, days=2)
+
+    def setUp(self):
+        # Cached pages and users would hide the queries of a cold request
+        get_cache().clear()
+
+
+@override_settings(
+    QUERY_BUDGET_ENFORCE=True,
+    PAYMENT_WORKERS=0,
+    PAYMENT_GATEWAY_OPTIONS={'latency': 0, 'failure_rate': 0},
+)
+class QueryBudgetTests(CatalogueTestCase):
+    """
+    Request the hot views cold with QUERY_BUDGET_ENFORCE on, so a view
+    running more queries than its QUERY_BUDGETS entry fails the test
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_budget_is_enforced(self):
+        with self.settings(QUERY_BUDGETS={'movies:home': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                Client().get(reverse('movies:home'))
+
+    def test_catalogue(self):
+        for url in [reverse('movies:home'), reverse('movies:home') + '?q=jaw&genre=ACTION',
+                    reverse('movies:movie_detail', args=[self.movie.id]), reverse('movies:shows_list'),
+                    reverse('movies:shows_list') + f'?movie={self.movie.id}']:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_my_bookings(self):
+        Booking.objects.create(user=self.user, show=self.show, seats_booked=2, total_price=500,
+                               payment_status='COMPLETED')
+        self.assertEqual(self.client.get(reverse('movies:my_bookings')).status_code, 200)
+
+    def test_booking_and_payment(self):
+        booking_url = reverse('movies:booking', args=[self.show.id])
+        self.assertEqual(self.client.get(booking_url).status_code, 200)
+        response = self.client.post(booking_url, {'seats': 2})
+        booking = Booking.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('movies:payment', args=[booking.id]), fetch_redirect_response=False)
+
+        payment_url = reverse('movies:payment', args=[booking.id])
+        self.assertEqual(self.client.get(payment_url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(payment_url, {'payment_method': 'UPI', 'upi_id': 'buyer@bank',
+                                           'idempotency_key': 'budget-key'})
+        booking.refresh_from_db()
+        self.assertEqual(booking.payment_status, 'COMPLETED')
+        response = self.client.get(reverse('movies:booking_confirmation', args=[booking.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cart_checkout(self):
+        for show in (self.show, self.other_show):
+            self.client.post(reverse('movies:booking', args=[show.id]), {'seats': 1, 'add_to_cart': '1'})
+        self.assertEqual(self.client.get(reverse('movies:cart')).status_code, 200)
+        self.client.post(reverse('movies:checkout'))
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(self.client.get(reverse('movies:order_payment', args=[order.id])).status_code, 200)
+
+
+class SeatMapTests(CatalogueTestCase):
+    def test_claim_and_release(self):
+        seat_map = SeatMap(10)
+        self.assertEqual(seat_map.claim_best(3), [1, 2, 3])
+        with self.assertRaises(SeatUnavailable) as cm:
+            seat_map.claim([3, 4, 11])
+        self.assertEqual(cm.exception.seats, [3, 11])
+        self.assertEqual(seat_map.free_count, 7)
+        self.assertEqual(seat_map.release([2, 5]), 1)
+        self.assertEqual(seat_map.free_seats(limit=2), [2, 4])
+
+    def test_claim_seats_updates_count(self):
+        self.assertEqual(claim_seats(self.show.id, [5, 6]), [5, 6])
+        show = Show.objects.get(id=self.show.id)
+        self.assertEqual(show.available_seats, 18)
+        self.assertTrue(SeatMap.for_show(show).is_taken(6))
+        self.assertEqual(claim_seats(self.show.id, count=2), [1, 2])
+
+    def test_lost_race_retries_on_fresh_map(self):
+        stale = Show.objects.select_related('theater').get(id=self.show.id)
+        claim_seats(self.show.id, [1])
+        # Another buyer wrote first: the retry re-reads and keeps both claims
+        with mock.patch('movies.seatmap.time.sleep') as sleep:
+            self.assertEqual(claim_seats(self.show.id, [2], show=stale), [2])
+        self.assertEqual(sleep.call_count, 1)
+        seat_map = SeatMap.for_show(Show.objects.get(id=self.show.id))
+        self.assertEqual(seat_map.free_count, 18)
+        with self.assertRaises(SeatUnavailable):
+            claim_seats(self.show.id, [1], show=stale)
+
+    def test_conflict_after_retries(self):
+        def change(seat_map):
+            # A concurrent writer bumps the version on every attempt
+            Show.objects.filter(id=self.show.id).update(seat_map_version=F('seat_map_version') + 1)
+            seat_map.claim([1])
+
+        with mock.patch('movies.seatmap.time.sleep') as sleep, self.assertRaises(SeatMapConflict):
+            update_seat_map(self.show.id, change, max_retries=3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(Show.objects.get(id=self.show.id).available_seats, 20)
+
+
+class HoldExpiryTests(CatalogueTestCase):
+    def test_reaper_returns_expired_seats(self):
+        stale = reserve_seats(self.user, self.show, 3)
+        fresh = reserve_seats(self.user, self.show, 2)
+        paid = reserve_seats(self.user, self.show, 1)
+        Booking.objects.filter(id__in=[stale.id, paid.id]).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        Booking.objects.filter(id=paid.id).update(payment_status='COMPLETED')
+
+        self.assertEqual(expire_stale_holds(), 1)
+        statuses = dict(Booking.objects.values_list('id', 'payment_status'))
+        self.assertEqual(statuses, {stale.id: 'EXPIRED', fresh.id: 'PENDING', paid.id: 'COMPLETED'})
+        show = Show.objects.get(id=self.show.id)
+        self.assertEqual(show.available_seats, 17)
+        seat_map = SeatMap.for_show(show)
+        self.assertFalse(any(seat_map.is_taken(seat) for seat in stale.seat_numbers))
+        self.assertTrue(all(seat_map.is_taken(seat) for seat in fresh.seat_numbers + paid.seat_numbers))
+        self.assertEqual(expire_stale_holds(), 0)
+
+
+class ReserveSeatsTests(CatalogueTestCase):
+    def test_reserve_never_oversells(self):
+        booking = reserve_seats(self.user, self.show, 15)
+        self.assertEqual((booking.seats_booked, booking.payment_status), (15, 'PENDING'))
+        self.assertEqual(booking.seat_numbers, list(range(1, 16)))
+        with self.assertRaises(SeatsUnavailable) as cm:
+            reserve_seats(self.user, self.show, 6)
+        self.assertEqual((cm.exception.available_seats, cm.exception.show_id), (5, self.show.id))
+        self.assertEqual(Show.objects.get(id=self.show.id).available_seats, 5)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_booking_view_reports_sold_out(self):
+        self.client.force_login(self.user)
+        reserve_seats(self.user, self.show, 19)
+        # The page was loaded while 20 seats were free
+        with mock.patch('movies.views.get_object_or_404', return_value=self.show):
+            response = self.client.post(reverse('movies:booking', args=[self.show.id]), {'seats': 2})
+        self.assertRedirects(response, reverse('movies:booking', args=[self.show.id]), fetch_redirect_response=False)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class SearchTests(CatalogueTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.jaws = Movie.objects.create(title='Jaws', description='A shark terrorizes a beach town', genre='THRILLER',
+                                        duration=124, release_date=date(1975, 6, 20))
+        cls.shark = Movie.objects.create(title='Deep Blue', description='Sharks with jawbones of steel', genre='ACTION',
+                                         duration=105, release_date=date(1999, 7, 28))
+        cls.retired = Movie.objects.create(title='Jawbreaker', description='Retired', genre='ACTION',
+                                           duration=90, release_date=date(1999, 2, 19), is_active=False)
+
+    def test_prefix_match_ranks_titles_first(self):
+        ids = search_movie_ids('jaw')
+        if ids is None:
+            self.skipTest('No full-text index on this database')
+        self.assertEqual(set(ids), {self.movie.id, self.jaws.id, self.shark.id})
+        self.assertEqual(ids[-1], self.shark.id)
+        self.assertEqual(search_movie_ids('shark jaw'), [self.jaws.id, self.shark.id])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(list(catalogue_movies('jaw beach', '')), [self.jaws])
+        self.assertNotIn(self.retired, catalogue_movies('jaw', ''))
+
+    def test_filters_apply_before_limit(self):
+        self.assertEqual(list(catalogue_movies('jaw', 'THRILLER')), [self.jaws])
+        ids = search_movie_ids('jaw', limit=1, genre='ACTION')
+        if ids is not None:
+            self.assertIn(ids, [[self.movie.id], [self.shark.id]])
+        self.assertEqual(search_movie_ids('jawbreaker'), [])
+
+
+class KeysetPaginationTests(CatalogueTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for days in range(3, 8):
+            create_show(cls.movie, cls.theater, days=days)
+
+    def pages(self, cursor=None, page_size=3):
+        shows, _ = upcoming_shows(QueryDict(''))
+        return keyset_paginate(shows, SHOWS_ORDERING, cursor, page_size)
+
+    def test_pages_cover_every_show_once(self):
+        seen = []
+        page = self.pages()
+        self.assertTrue(page.is_first)
+        while True:
+            seen.extend(show.id for show in page)
+            if not page.has_next:
+                break
+            page = self.pages(page.next_cursor)
+            self.assertFalse(page.is_first)
+        expected = list(Show.objects.order_by(*SHOWS_ORDERING).values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+
+    def test_bad_cursor_starts_over(self):
+        first = [show.id for show in self.pages()]
+        valid = self.pages().next_cursor
+        garbage = ['not-base64!', base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+                   base64.urlsafe_b64encode(json.dumps(['2024-13-45', '18:00:00', 1]).encode()).decode(),
+                   valid[:-4]]
+        for cursor in garbage:
+            with self.subTest(cursor=cursor):
+                page = self.pages(cursor)
+                self.assertTrue(page.is_first)
+                self.assertEqual([show.id for show in page], first)
+        response = self.client.get(reverse('movies:shows_list'), {'cursor': 'not-base64!'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ImportCatalogueTests(CatalogueTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def run_import(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_catalogue', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def movie_row(self, title, description='Imported', duration=100):
+        return json.dumps({'title': title, 'description': description, 'genre': 'DRAMA',
+                           'duration': duration, 'release_date': '2024-01-05'})
+
+    def test_invalid_records_are_reported(self):
+        path = self.write('movies.jsonl', [
+            self.movie_row('Good'),
+            self.movie_row('Bad duration', duration='long'),
+            '{"title": "Broken"',
+            '["not", "an", "object"]',
+            json.dumps({'title': 'No date', 'description': 'x', 'genre': 'DRAMA', 'duration': 90}),
+        ])
+        out, err = self.run_import('movies', path)
+        self.assertIn('Imported 1 movies (4 invalid record(s) skipped)', out)
+        for line in ('Line 2:', 'Line 3: Invalid JSON', 'Line 4: Expected a JSON object', 'Line 5:'):
+            self.assertIn(line, err)
+        self.assertTrue(Movie.objects.filter(title='Good').exists())
+
+    def test_upsert_by_natural_key(self):
+        path = self.write('movies.csv', ['title,description,genre,duration,release_date',
+                                         'Upserted,First,DRAMA,100,2024-01-05'])
+        self.run_import('movies', path)
+        self.write('movies.csv', ['title,description,genre,duration,release_date',
+                                  'Upserted,Second,DRAMA,110,2024-01-05'])
+        self.run_import('movies', path)
+        movie = Movie.objects.get(title='Upserted')
+        self.assertEqual((movie.description, movie.duration), ('Second', 110))
+
+    def test_show_seats_above_capacity_are_rejected(self):
+        path = self.write('shows.jsonl', [json.dumps({
+            'movie': self.movie.id, 'theater': self.theater.name, 'show_date': '2031-03-01',
+            'show_time': '10:00', 'price': '200', 'available_seats': seats,
+        }) for seats in (25, 5)])
+        out, err = self.run_import('shows', path)
+        self.assertIn('Line 1: Must be between 0 and the theater capacity of 20.', err)
+        self.assertIn('Imported 1 shows (1 invalid record(s) skipped)', out)
+        show = Show.objects.get(show_date=date(2031, 3, 1))
+        self.assertEqual((show.available_seats, SeatMap.for_show(show).free_count), (5, 5))
+
+    def test_resume_after_too_many_errors(self):
+        lines = [self.movie_row(f'Batch {i}') for i in range(4)]
+        lines[2] = self.movie_row('Batch 2', duration='long')
+        path = self.write('movies.jsonl', lines)
+        with self.assertRaises(CommandError):
+            self.run_import('movies', path, '--batch-size', '2', '--max-errors', '0')
+        self.assertEqual(Movie.objects.filter(title__startswith='Batch').count(), 2)
+        with open(f'{path}.checkpoint') as f:
+            self.assertEqual(json.load(f), {'records': 2})
+
+        # Fix the bad record; the first batch is not read again
+        lines[0] = self.movie_row('Batch 0', description='Changed')
+        lines[2] = self.movie_row('Batch 2')
+        self.write('movies.jsonl', lines)
+        out, _ = self.run_import('movies', path, '--batch-size', '2', '--resume')
+        self.assertIn('Resuming after 2 record(s)', out)
+        self.assertEqual(Movie.objects.filter(title__startswith='Batch').count(), 4)
+        self.assertEqual(Movie.objects.get(title='Batch 0').description, 'Imported')
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+
+class CountingGateway(FakeGateway):
+    """FakeGateway that never fails and counts the charges it is asked for"""
+    charged = []
+
+    def __init__(self, **options):
+        super().__init__(latency=0, failure_rate=0)
+
+    def charge(self, idempotency_key, amount, method):
+        self.charged.append(idempotency_key)
+        return super().charge(idempotency_key, amount, method)
+
+
+@override_settings(PAYMENT_WORKERS=0, PAYMENT_GATEWAY='movies.tests.CountingGateway')
+class IdempotentPaymentTests(CatalogueTestCase):
+    def setUp(self):
+        super().setUp()
+        CountingGateway.charged = []
+        self.client.force_login(self.user)
+        self.booking = reserve_seats(self.user, self.show, 2)
+
+    def pay(self, key):
+        return self.client.post(reverse('movies:payment', args=[self.booking.id]), {
+            'payment_method': 'UPI', 'upi_id': 'buyer@bank', 'idempotency_key': key,
+        })
+
+    def test_double_submit_charges_once(self):
+        # Both submits land before the first charge is queued
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pay('double-submit')
+            self.pay('double-submit')
+        self.assertEqual(CountingGateway.charged, ['double-submit'])
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.payment_status, self.booking.payment_key), ('COMPLETED', 'double-submit'))
+
+    def test_retry_after_decline_needs_a_new_key(self):
+        Booking.objects.filter(id=self.booking.id).update(payment_status='FAILED', payment_key='declined')
+        self.assertFalse(start_payment(self.booking, 'declined', 'UPI'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(start_payment(self.booking, 'second-try', 'UPI'))
+        self.assertEqual(CountingGateway.charged, ['second-try'])
+        self.assertEqual(Booking.objects.get(id=self.booking.id).payment_status, 'COMPLETED')
+
+
+class CheckoutTests(CatalogueTestCase):
+    def test_checkout_reserves_every_show(self):
+        order = checkout(self.user, {self.show.id: 2, self.other_show.id: 3})
+        self.assertEqual(order.total_price, 5 * 250)
+        self.assertEqual(sorted(order.bookings.values_list('show_id', 'seats_booked')),
+                         [(self.show.id, 2), (self.other_show.id, 3)])
+        self.assertEqual(dict(Show.objects.values_list('id', 'available_seats')),
+                         {self.show.id: 18, self.other_show.id: 17})
+
+    def test_short_show_rolls_back_the_whole_cart(self):
+        reserve_seats(self.user, self.other_show, 19)
+        with self.assertRaises(SeatsUnavailable) as cm:
+            checkout(self.user, {self.show.id: 2, self.other_show.id: 3})
+        self.assertEqual((cm.exception.available_seats, cm.exception.show_id), (1, self.other_show.id))
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+        show = Show.objects.get(id=self.show.id)
+        self.assertEqual((show.available_seats, SeatMap.for_show(show).free_count), (20, 20))
+
+    def test_view_keeps_the_cart_when_a_show_is_short(self):
+        self.client.force_login(self.user)
+        for show, seats in ((self.show, 2), (self.other_show, 3)):
+            self.client.post(reverse('movies:booking', args=[show.id]), {'seats': seats, 'add_to_cart': '1'})
+        reserve_seats(self.user, self.other_show, 19)
+        response = self.client.post(reverse('movies:checkout'))
+        self.assertRedirects(response, reverse('movies:cart'), fetch_redirect_response=False)
+        self.assertEqual(self.client.session['cart'], {str(self.show.id): 2, str(self.other_show.id): 3})
+        self.assertFalse(Order.objects.exists())
+
+
+class ScheduleOverlapTests(CatalogueTestCase):
+    """The movie runs 120 minutes plus the 15-minute turnaround"""
+
+    def unsaved_show(self, days, at):
+        return Show(movie=self.movie, theater=self.theater, show_date=timezone.localdate() + timedelta(days=days),
+                    show_time=at, price=250, available_seats=20)
+
+    @override_settings(SHOW_TURNAROUND_MINUTES=15)
+    def test_clean_rejects_overlaps(self):
+        with self.assertRaises(ValidationError) as cm:
+            self.unsaved_show(1, time(19, 0)).clean()
+        self.assertIn('show_time', cm.exception.message_dict)
+        with self.assertRaises(ValidationError):
+            self.unsaved_show(1, time(16, 0)).clean()
+        # Back to back is fine, and a show never clashes with itself
+        self.unsaved_show(1, time(20, 15)).clean()
+        self.unsaved_show(1, time(15, 45)).clean()
+        self.show.clean()
+
+    @override_settings(SHOW_TURNAROUND_MINUTES=15)
+    def test_clean_sees_shows_across_midnight(self):
+        create_show(self.movie, self.theater, days=3, at=time(23, 0))
+        with self.assertRaises(ValidationError):
+            self.unsaved_show(4, time(0, 30)).clean()
+        self.unsaved_show(4, time(1, 15)).clean()
+
+    @override_settings(SHOW_TURNAROUND_MINUTES=15)
+    def test_schedule_shows_skips_overlaps(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        template = os.path.join(directory.name, 'template.json')
+        with open(template, 'w') as f:
+            json.dump([{'theaters': [self.theater.name], 'movies': [self.movie.title],
+                        'times': ['10:00', '11:00', '12:30', '17:00']}], f)
+        args = ['schedule_shows', '--start', self.show.show_date.isoformat(), '--days', '1', '--template', template]
+
+        out = StringIO()
+        call_command(*args, stdout=out)
+        self.assertIn('Scheduled 2 new show(s)', out.getvalue())
+        self.assertIn('skipped 2', out.getvalue())
+        times = Show.objects.filter(show_date=self.show.show_date).order_by('show_time').values_list(
+            'show_time', flat=True)
+        self.assertEqual(list(times), [time(10, 0), time(12, 30), time(18, 0)])
+
+        out = StringIO()
+        call_command(*args, stdout=out)
+        self.assertIn('Scheduled 0 new show(s)', out.getvalue())
@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI, serve the read-only catalogue views asynchronously
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 app_name = 'movies'
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('movie/<int:movie_id>/', views.movie_detail, name='movie_detail'),
-    path('shows/', views.shows_list, name='shows_list'),
+    path('', read_views.home, name='home'),
+    path('movie/<int:movie_id>/', read_views.movie_detail, name='movie_detail'),
+    path('shows/', read_views.shows_list, name='shows_list'),
     path('about/', views.about, name='about'),
     
     # Authentication URLs
@@ -16,7 +23,16 @@ urlpatterns = [
     
     # Booking URLs
     path('booking/<int:show_id>/', views.booking_page, name='booking'),
+    path('show/<int:show_id>/seats/stream/', views.seat_stream, name='seat_stream'),
     path('payment/<int:booking_id>/', views.payment_page, name='payment'),
+    path('cart/', views.cart, name='cart'),
+    path('cart/remove/<int:show_id>/', views.cart_remove, name='cart_remove'),
+    path('cart/checkout/', views.checkout, name='checkout'),
+    path('order/<int:order_id>/payment/', views.order_payment, name='order_payment'),
     path('booking/confirmation/<int:booking_id>/', views.booking_confirmation, name='booking_confirmation'),
-    path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('my-bookings/', read_views.my_bookings, name='my_bookings'),
+    
+    # Monitoring
+    path('metrics/', views.performance_metrics, name='performance_metrics'),
+    path('reports/sales/', views.sales_report, name='sales_report'),
 ]
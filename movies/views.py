@@ -1,17 +1,48 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
 from django.db.models import Q
-from django.db import transaction
 from django import forms
 from django.utils import timezone
-from .models import Movie, Show, Theater, Booking
-from datetime import date
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.messages import get_messages
+from .models import Movie, Show, Theater, Booking, Order
+from . import analytics, cache as catalogue_cache
+from .services import checkout as checkout_order, reserve_seats, SeatsUnavailable
+from .seatmap import SeatMapConflict
+from .payments import start_order_payment, start_payment
+from .search import search_movies
+from .pagination import keyset_paginate
+from .instrumentation import view_stats
+from .db.pool import pool_stats
+from .pubsub import AsyncSubscriber, ThreadSubscriber, broker as seat_broker
+from .showtimes import get_showtimes
+from .routers import replica_reads
+from datetime import date, timedelta
+import time
 import uuid
 
 
+SHOWS_ORDERING = ['show_date', 'show_time', 'id']
+SHOWS_PAGE_SIZE = 24
+SSE_KEEPALIVE_SECONDS = 15
+# A sync worker serves one stream at a time: end it before gunicorn's 30s
+# worker timeout and have the browser come back much later
+SSE_SYNC_STREAM_SECONDS = 20
+SSE_SYNC_RETRY_SECONDS = 60
+# Django does not notice an ASGI client going away, so async streams end
+# too and the browser reconnects at once; a closed tab is freed by then
+SSE_ASYNC_STREAM_SECONDS = 300
+SSE_ASYNC_RETRY_SECONDS = 1
+CART_SESSION_KEY = 'cart'
+CART_MAX_SHOWS = 10
+
+
 # Customize form field attributes
 def customize_form(form):
     """Add Bootstrap classes to form fields"""
@@ -22,67 +53,129 @@ def customize_form(form):
         elif isinstance(field.widget, forms.TextInput):
             field.widget.attrs['placeholder'] = f'Enter {field.label.lower()}'
 
-def home(request):
+def catalogue_movies(search_query, genre_filter):
     """
-    Dynamic home page displaying all active movies
+    Active movies matching the home page search and genre filter
     """
     # Get all active movies
     movies = Movie.objects.filter(is_active=True)
     
-    # Get search query if exists
-    search_query = request.GET.get('search', '')
-    if search_query:
-        movies = movies.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(genre__icontains=search_query)
-        )
-    
     # Get genre filter if exists
-    genre_filter = request.GET.get('genre', '')
     if genre_filter:
         movies = movies.filter(genre=genre_filter)
     
+    # Get search query if exists; the index filters before it limits
+    if search_query:
+        movies = search_movies(movies, search_query, active_only=True, genre=genre_filter)
+    return movies
+
+
+@replica_reads
+def home(request):
+    """
+    Dynamic home page displaying all active movies
+    """
+    search_query = request.GET.get('search', '')
+    genre_filter = request.GET.get('genre', '')
+    
+    # Anonymous visitors all see the same page, so serve it from cache
+    cacheable = not request.user.is_authenticated and not get_messages(request)
+    if cacheable:
+        cache_key = catalogue_cache.catalogue_key('home', search_query, genre_filter)
+        content = catalogue_cache.get_page(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+    
+    movies = catalogue_movies(search_query, genre_filter)
+    
     context = {
         'movies': movies,
         'search_query': search_query,
         'genre_filter': genre_filter,
         'genres': Movie.GENRE_CHOICES,
     }
-    return render(request, 'movies/home.html', context)
+    response = render(request, 'movies/home.html', context)
+    if cacheable:
+        catalogue_cache.set_page(cache_key, response.content)
+    return response
 
 
+@replica_reads
 def movie_detail(request, movie_id):
     """
     Movie detail page with available shows
     """
     movie = get_object_or_404(Movie, id=movie_id)
-    # Show all shows for this movie (including past for demo)
-    shows = Show.objects.filter(movie=movie).select_related('theater').order_by('show_date', 'show_time')
-    
-    # If you want only upcoming shows, uncomment the line below:
-    # shows = shows.filter(show_date__gte=date.today())
-    
+    # All shows for this movie (including past for demo), from the cached grid
     context = {
         'movie': movie,
-        'shows': shows,
+        'showtimes': get_showtimes(movie.id),
     }
     return render(request, 'movies/movie_detail.html', context)
 
 
-def shows_list(request):
+def upcoming_shows(params):
     """
-    List all upcoming shows
+    Shows matching the theater/movie/date filters in ``params``; without a
+    date, only shows that haven't started yet. Returns the queryset and
+    the cleaned filter values.
     """
-    # Get all shows, not just future ones (for testing/demo purposes)
-    shows = Show.objects.all().select_related('movie', 'theater').order_by('show_date', 'show_time')
+    shows = Show.objects.select_related('movie', 'theater')
+    
+    # Filters
+    theater_filter = params.get('theater', '')
+    movie_filter = params.get('movie', '')
+    date_filter = params.get('date', '')
+    if theater_filter.isdigit():
+        shows = shows.filter(theater_id=theater_filter)
+    if movie_filter.isdigit():
+        shows = shows.filter(movie_id=movie_filter)
     
-    # If you want to filter by upcoming only, uncomment the line below:
-    # shows = shows.filter(show_date__gte=date.today())
+    try:
+        selected_date = date.fromisoformat(date_filter) if date_filter else None
+    except ValueError:
+        selected_date = None
+    
+    if selected_date:
+        shows = shows.filter(show_date=selected_date)
+    else:
+        # Default window: only shows that haven't started yet
+        now = timezone.localtime()
+        shows = shows.filter(
+            Q(show_date__gt=now.date()) |
+            Q(show_date=now.date(), show_time__gte=now.time())
+        )
+    
+    filters = {
+        'theater_filter': theater_filter,
+        'movie_filter': movie_filter,
+        'date_filter': selected_date.isoformat() if selected_date else '',
+    }
+    return shows, filters
+
+
+def filter_query(request):
+    """Current query string minus the cursor, for next-page links"""
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    return query.urlencode()
+
+
+@replica_reads
+def shows_list(request):
+    """
+    List upcoming shows, a page at a time
+    """
+    shows, filters = upcoming_shows(request.GET)
+    page = keyset_paginate(shows, SHOWS_ORDERING, request.GET.get('cursor'), SHOWS_PAGE_SIZE)
     
     context = {
-        'shows': shows,
-        'total_shows': shows.count(),
+        'shows': page,
+        'page': page,
+        'filter_query': filter_query(request),
+        'theaters': Theater.objects.only('id', 'name').order_by('name'),
+        'movies': Movie.objects.filter(is_active=True).only('id', 'title').order_by('title'),
+        **filters,
     }
     return render(request, 'movies/shows_list.html', context)
 
@@ -158,7 +251,7 @@ def booking_page(request, show_id):
     """
     Booking page with seat selection
     """
-    show = get_object_or_404(Show, id=show_id)
+    show = get_object_or_404(Show.objects.select_related('movie', 'theater'), id=show_id)
     
     if request.method == 'POST':
         seats_requested = int(request.POST.get('seats', 0))
@@ -167,131 +260,126 @@ def booking_page(request, show_id):
             messages.error(request, 'Please select at least one seat.')
         elif seats_requested > show.available_seats:
             messages.error(request, f'Only {show.available_seats} seats available.')
+        elif 'add_to_cart' in request.POST:
+            # Nothing is reserved until checkout
+            cart = get_cart(request.session)
+            if show.id not in cart and len(cart) >= CART_MAX_SHOWS:
+                messages.error(request, f'Your cart can hold up to {CART_MAX_SHOWS} shows.')
+                return redirect('movies:cart')
+            cart[show.id] = seats_requested
+            save_cart(request.session, cart)
+            messages.success(request, f'Added {seats_requested} seats for {show.movie.title} to your cart.')
+            return redirect('movies:cart')
         else:
-            total_price = seats_requested * show.price
-            
-            # Create booking with transaction to prevent race conditions
+            # Reserve with a conditional UPDATE so concurrent bookings never oversell
             try:
-                with transaction.atomic():
-                    # Refresh show data to get latest seat availability
-                    show = Show.objects.select_for_update().get(id=show_id)
-                    
-                    # Double-check availability after locking
-                    if seats_requested > show.available_seats:
-                        messages.error(request, f'Sorry! Only {show.available_seats} seats available now. Another user may have just booked.')
-                        return redirect('movies:booking', show_id=show_id)
-                    
-                    # Create the booking with pending payment
-                    booking = Booking.objects.create(
-                        user=request.user,
-                        show=show,
-                        seats_booked=seats_requested,
-                        total_price=total_price,
-                        payment_status='PENDING'
-                    )
-                    
-                    # Update available seats
-                    show.available_seats -= seats_requested
-                    show.save()
-                
-                # Redirect to payment page
-                return redirect('movies:payment', booking_id=booking.id)
-            except Exception as e:
+                booking = reserve_seats(request.user, show, seats_requested)
+            except SeatsUnavailable as e:
+                messages.error(request, f'Sorry! Only {e.available_seats} seats available now. Another user may have just booked.')
+                return redirect('movies:booking', show_id=show_id)
+            except SeatMapConflict:
+                messages.error(request, 'This show is selling fast and your seats could not be reserved. Please try again.')
+                return redirect('movies:booking', show_id=show_id)
+            except Exception:
                 messages.error(request, 'An error occurred while processing your booking. Please try again.')
                 return redirect('movies:booking', show_id=show_id)
+            
+            # Redirect to payment page
+            return redirect('movies:payment', booking_id=booking.id)
     
     context = {
         'show': show,
+        # Live updates would hold a sync worker for as long as the page is open
+        'live_seats': isinstance(request, ASGIRequest),
     }
     return render(request, 'movies/booking.html', context)
 
 
+def payment_errors(post, payment_method):
+    """
+    Validate the payment details submitted for ``payment_method`` and
+    return a list of error messages
+    """
+    validation_errors = []
+    
+    if payment_method in ['CREDIT_CARD', 'DEBIT_CARD']:
+        card_number = post.get('card_number', '').replace(' ', '')
+        card_holder = post.get('card_holder', '')
+        expiry_date = post.get('expiry_date', '')
+        cvv = post.get('cvv', '')
+    
+        if not card_number or len(card_number) != 16 or not card_number.isdigit():
+            validation_errors.append('Invalid card number. Must be 16 digits.')
+        if not card_holder or len(card_holder) < 3:
+            validation_errors.append('Please enter card holder name.')
+        if not expiry_date or len(expiry_date) != 5:
+            validation_errors.append('Invalid expiry date. Format: MM/YY')
+        if not cvv or len(cvv) != 3 or not cvv.isdigit():
+            validation_errors.append('Invalid CVV. Must be 3 digits.')
+    
+    elif payment_method == 'UPI':
+        upi_id = post.get('upi_id', '')
+        if not upi_id or '@' not in upi_id:
+            validation_errors.append('Invalid UPI ID. Format: username@bank')
+    
+    elif payment_method == 'NET_BANKING':
+        bank_name = post.get('bank_name', '')
+        if not bank_name:
+            validation_errors.append('Please select a bank.')
+    
+    elif payment_method == 'WALLET':
+        wallet_type = post.get('wallet_type', '')
+        if not wallet_type:
+            validation_errors.append('Please select a wallet.')
+    
+    return validation_errors
+
+
 @login_required
 def payment_page(request, booking_id):
     """
     Payment page for booking
     """
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_object_or_404(
+        Booking.objects.select_related('show__movie', 'show__theater'), id=booking_id, user=request.user
+    )
     
     # Redirect if already paid
     if booking.payment_status == 'COMPLETED':
         return redirect('movies:booking_confirmation', booking_id=booking.id)
     
+    # Bookings bought through the cart are paid for as one order
+    if booking.order_id:
+        return redirect('movies:order_payment', order_id=booking.order_id)
+    
+    # Seats were given back after the hold ran out
+    if booking.payment_status == 'EXPIRED':
+        messages.error(request, 'Your seat hold has expired. Please book again.')
+        return redirect('movies:booking', show_id=booking.show_id)
+    
     if request.method == 'POST':
         payment_method = request.POST.get('payment_method')
         
         if not payment_method:
             messages.error(request, 'Please select a payment method.')
         else:
-            # Validate payment details based on method
-            validation_errors = []
-            
-            if payment_method in ['CREDIT_CARD', 'DEBIT_CARD']:
-                card_number = request.POST.get('card_number', '').replace(' ', '')
-                card_holder = request.POST.get('card_holder', '')
-                expiry_date = request.POST.get('expiry_date', '')
-                cvv = request.POST.get('cvv', '')
-                
-                if not card_number or len(card_number) != 16 or not card_number.isdigit():
-                    validation_errors.append('Invalid card number. Must be 16 digits.')
-                if not card_holder or len(card_holder) < 3:
-                    validation_errors.append('Please enter card holder name.')
-                if not expiry_date or len(expiry_date) != 5:
-                    validation_errors.append('Invalid expiry date. Format: MM/YY')
-                if not cvv or len(cvv) != 3 or not cvv.isdigit():
-                    validation_errors.append('Invalid CVV. Must be 3 digits.')
-                    
-            elif payment_method == 'UPI':
-                upi_id = request.POST.get('upi_id', '')
-                if not upi_id or '@' not in upi_id:
-                    validation_errors.append('Invalid UPI ID. Format: username@bank')
-                    
-            elif payment_method == 'NET_BANKING':
-                bank_name = request.POST.get('bank_name', '')
-                if not bank_name:
-                    validation_errors.append('Please select a bank.')
-                    
-            elif payment_method == 'WALLET':
-                wallet_type = request.POST.get('wallet_type', '')
-                if not wallet_type:
-                    validation_errors.append('Please select a wallet.')
-            
+            validation_errors = payment_errors(request.POST, payment_method)
             if validation_errors:
                 for error in validation_errors:
                     messages.error(request, error)
             else:
-                try:
-                    with transaction.atomic():
-                        # Simulate payment processing
-                        booking = Booking.objects.select_for_update().get(id=booking_id)
-                        
-                        # Generate payment ID
-                        payment_id = f"PAY{uuid.uuid4().hex[:12].upper()}"
-                        
-                        # Simulate 10% chance of payment failure for realism
-                        import random
-                        if random.random() < 0.1:  # 10% failure rate
-                            booking.payment_status = 'FAILED'
-                            booking.save()
-                            messages.error(request, '❌ Payment failed. Please check your payment details and try again.')
-                            return redirect('movies:payment', booking_id=booking_id)
-                        
-                        # Update booking with payment info
-                        booking.payment_status = 'COMPLETED'
-                        booking.payment_method = payment_method
-                        booking.payment_id = payment_id
-                        booking.payment_date = timezone.now()
-                        booking.save()
-                    
-                    messages.success(request, f'✅ Payment successful! Transaction ID: {payment_id}')
-                    return redirect('movies:booking_confirmation', booking_id=booking.id)
-                except Exception as e:
-                    messages.error(request, '❌ Payment processing error. Please try again.')
-                    return redirect('movies:payment', booking_id=booking_id)
+                # The gateway round trip happens on the payment workers;
+                # a double submit reuses the form's key and is ignored
+                key = request.POST.get('idempotency_key') or uuid.uuid4().hex
+                if start_payment(booking, key[:64], payment_method):
+                    messages.info(request, 'Processing your payment...')
+                return redirect('movies:payment', booking_id=booking.id)
     
     context = {
         'booking': booking,
+        'payable': booking,
         'payment_methods': Booking.PAYMENT_METHOD_CHOICES,
+        'idempotency_key': uuid.uuid4().hex,
     }
     return render(request, 'movies/payment.html', context)
 
@@ -301,7 +389,9 @@ def booking_confirmation(request, booking_id):
     """
     Booking confirmation page
     """
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_object_or_404(
+        Booking.objects.select_related('show__movie', 'show__theater'), id=booking_id, user=request.user
+    )
     
     # Redirect to payment if not paid
     if booking.payment_status != 'COMPLETED':
@@ -314,16 +404,281 @@ def booking_confirmation(request, booking_id):
     return render(request, 'movies/booking_confirmation.html', context)
 
 
+def get_cart(session):
+    """The session cart as {show_id: seats}; nothing is reserved until checkout"""
+    return {int(show_id): seats for show_id, seats in session.get(CART_SESSION_KEY, {}).items()}
+
+
+def save_cart(session, cart):
+    session[CART_SESSION_KEY] = {str(show_id): seats for show_id, seats in cart.items()}
+
+
 @login_required
-def my_bookings(request):
+def cart(request):
+    """
+    Shows waiting in the cart, priced at their current price
+    """
+    items = get_cart(request.session)
+    shows = Show.objects.select_related('movie', 'theater').filter(id__in=items).order_by(*SHOWS_ORDERING)
+    lines = [
+        {'show': show, 'seats': items[show.id], 'subtotal': items[show.id] * show.price}
+        for show in shows
+    ]
+    context = {
+        'lines': lines,
+        'total': sum(line['subtotal'] for line in lines),
+    }
+    return render(request, 'movies/cart.html', context)
+
+
+@login_required
+def cart_remove(request, show_id):
+    """
+    Take a show out of the cart
+    """
+    if request.method == 'POST':
+        items = get_cart(request.session)
+        if items.pop(show_id, None) is not None:
+            save_cart(request.session, items)
+    return redirect('movies:cart')
+
+
+@login_required
+def checkout(request):
+    """
+    Reserve every show in the cart at once and move on to paying the order
+    """
+    items = get_cart(request.session)
+    if request.method != 'POST' or not items:
+        return redirect('movies:cart')
+    
+    try:
+        order = checkout_order(request.user, items)
+    except SeatsUnavailable as e:
+        show = Show.objects.select_related('movie').filter(id=e.show_id).first()
+        if show is None:
+            items.pop(e.show_id, None)
+            save_cart(request.session, items)
+            messages.error(request, 'A show in your cart is no longer available and has been removed.')
+        else:
+            messages.error(request, f'Sorry! Only {e.available_seats} seats are left for {show.movie.title} '
+                                    f'on {show.show_date:%b %d}. Please update your cart.')
+        return redirect('movies:cart')
+    except SeatMapConflict:
+        messages.error(request, 'These shows are selling fast and your seats could not be reserved. Please try again.')
+        return redirect('movies:cart')
+    except Exception:
+        messages.error(request, 'An error occurred while processing your order. Please try again.')
+        return redirect('movies:cart')
+    
+    save_cart(request.session, {})
+    return redirect('movies:order_payment', order_id=order.id)
+
+
+@login_required
+def order_payment(request, order_id):
     """
-    User's booking history
+    Payment page for a cart order, charged once for all of its bookings
     """
-    bookings = Booking.objects.filter(user=request.user).select_related(
+    order = get_object_or_404(Order, id=order_id, user=request.user)
+    
+    if order.payment_status == 'COMPLETED':
+        messages.success(request, 'Payment successful! Your bookings are confirmed.')
+        return redirect('movies:my_bookings')
+    
+    if order.payment_status == 'EXPIRED':
+        messages.error(request, 'Your seat hold has expired. Please book again.')
+        return redirect('movies:cart')
+    
+    if request.method == 'POST':
+        payment_method = request.POST.get('payment_method')
+        
+        if not payment_method:
+            messages.error(request, 'Please select a payment method.')
+        else:
+            validation_errors = payment_errors(request.POST, payment_method)
+            if validation_errors:
+                for error in validation_errors:
+                    messages.error(request, error)
+            else:
+                key = request.POST.get('idempotency_key') or uuid.uuid4().hex
+                if start_order_payment(order, key[:64], payment_method):
+                    messages.info(request, 'Processing your payment...')
+                return redirect('movies:order_payment', order_id=order.id)
+    
+    context = {
+        'order': order,
+        'order_bookings': order.bookings.select_related('show__movie', 'show__theater').order_by('show_id'),
+        'payable': order,
+        'payment_methods': Booking.PAYMENT_METHOD_CHOICES,
+        'idempotency_key': uuid.uuid4().hex,
+    }
+    return render(request, 'movies/payment.html', context)
+
+
+MY_BOOKINGS_ORDERING = ['-booking_date', '-id']
+MY_BOOKINGS_PAGE_SIZE = 12
+MY_BOOKINGS_SECTIONS = ['upcoming', 'past']
+# Columns the booking cards render; descriptions and payment details stay in the database
+BOOKING_CARD_FIELDS = [
+    'id', 'booking_date', 'seats_booked', 'total_price', 'payment_status', 'user_id',
+    'show__id', 'show__show_date', 'show__show_time',
+    'show__movie__id', 'show__movie__title', 'show__movie__poster', 'show__movie__poster_hash',
+    'show__movie__poster_width',
+    'show__theater__id', 'show__theater__name', 'show__theater__location',
+]
+
+
+def section_bookings(user_id, section, today):
+    """A user's bookings for shows from ``today`` on (upcoming) or before it (past)"""
+    bookings = Booking.objects.filter(user_id=user_id).select_related(
         'show__movie', 'show__theater'
-    ).order_by('-booking_date')
+    ).only(*BOOKING_CARD_FIELDS)
+    if section == 'upcoming':
+        return bookings.filter(show__show_date__gte=today)
+    return bookings.filter(show__show_date__lt=today)
+
+
+def booking_section(user_id, section, cursor):
+    """
+    One page of a user's upcoming or past bookings as rendered cards plus
+    the next cursor, cached until their bookings or the catalogue change.
+    Rendering a page costs the same however long the history is.
+    """
+    today = timezone.localdate()
+    key = catalogue_cache.bookings_key(user_id, section, today, cursor)
+    cached = catalogue_cache.get_page(key)
+    if cached is not None:
+        return cached
+    
+    page = keyset_paginate(section_bookings(user_id, section, today), MY_BOOKINGS_ORDERING, cursor,
+                           MY_BOOKINGS_PAGE_SIZE)
     
+    result = {
+        'html': render_to_string('movies/_booking_cards.html', {'bookings': page}),
+        'count': len(page),
+        'next_cursor': page.next_cursor,
+        'is_first': page.is_first,
+    }
+    catalogue_cache.set_page(key, result)
+    return result
+
+
+def booking_sections(params, user_id):
+    """Both sections of my_bookings, each with links that only move its own cursor"""
+    sections = {}
+    for section in MY_BOOKINGS_SECTIONS:
+        data = dict(booking_section(user_id, section, params.get(section)))
+        first = params.copy()
+        first.pop(section, None)
+        data['first_query'] = first.urlencode()
+        if data['next_cursor']:
+            following = params.copy()
+            following[section] = data['next_cursor']
+            data['next_query'] = following.urlencode()
+        sections[section] = data
+    return sections
+
+
+@login_required
+def my_bookings(request):
+    """
+    User's booking history, upcoming and past, a page at a time
+    """
+    sections = booking_sections(request.GET, request.user.id)
     context = {
-        'bookings': bookings,
+        'upcoming': sections['upcoming'],
+        'past': sections['past'],
+        'has_bookings': any(section['count'] or not section['is_first'] for section in sections.values()),
     }
     return render(request, 'movies/my_bookings.html', context)
+
+
+@staff_member_required
+def sales_report(request):
+    """
+    Revenue per movie per day, occupancy per theater and payment mix for a
+    range of show dates, read from the sales rollup (staff only)
+    """
+    try:
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        end = timezone.localdate()
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+    except ValueError:
+        start = end - timedelta(days=29)
+    
+    payment_methods = dict(Booking.PAYMENT_METHOD_CHOICES)
+    context = {
+        'start': start,
+        'end': end,
+        'revenue': analytics.revenue_by_movie(start, end),
+        'occupancy': analytics.occupancy_by_theater(start, end),
+        'payment_mix': [
+            dict(row, method=payment_methods.get(row['payment_method'], 'Other'))
+            for row in analytics.payment_mix(start, end)
+        ],
+    }
+    return render(request, 'movies/sales_report.html', context)
+
+
+@staff_member_required
+def performance_metrics(request):
+    """
+    Rolling per-view latency, query and size percentiles, plus this
+    process's database connection pools (staff only)
+    """
+    metrics = view_stats.snapshot()
+    metrics['connection_pools'] = pool_stats()
+    return JsonResponse(metrics)
+
+
+def _seat_event(available_seats):
+    return f'event: seats\ndata: {{"available_seats": {available_seats}}}\n\n'
+
+
+def _sync_seat_events(show_id, available_seats):
+    subscriber = seat_broker.subscribe(show_id, ThreadSubscriber())
+    deadline = time.monotonic() + SSE_SYNC_STREAM_SECONDS
+    try:
+        yield f'retry: {SSE_SYNC_RETRY_SECONDS * 1000}\n'
+        yield _seat_event(available_seats)
+        while (remaining := deadline - time.monotonic()) > 0:
+            value = subscriber.get(min(SSE_KEEPALIVE_SECONDS, remaining))
+            yield ': keepalive\n\n' if value is None else _seat_event(value)
+    finally:
+        seat_broker.unsubscribe(show_id, subscriber)
+
+
+async def _async_seat_events(show_id, available_seats):
+    subscriber = seat_broker.subscribe(show_id, AsyncSubscriber())
+    deadline = time.monotonic() + SSE_ASYNC_STREAM_SECONDS
+    try:
+        yield f'retry: {SSE_ASYNC_RETRY_SECONDS * 1000}\n'
+        yield _seat_event(available_seats)
+        while (remaining := deadline - time.monotonic()) > 0:
+            value = await subscriber.get(min(SSE_KEEPALIVE_SECONDS, remaining))
+            yield ': keepalive\n\n' if value is None else _seat_event(value)
+    finally:
+        seat_broker.unsubscribe(show_id, subscriber)
+
+
+def seat_stream(request, show_id):
+    """
+    Server-Sent Events stream of a show's available seat count
+    """
+    available_seats = Show.objects.filter(id=show_id).values_list('available_seats', flat=True).first()
+    if available_seats is None:
+        raise Http404('No Show matches the given query.')
+    
+    # Under ASGI the stream is served from the event loop; either way it
+    # ends after a while and the browser reconnects, see SSE_*_STREAM_SECONDS
+    if isinstance(request, ASGIRequest):
+        events = _async_seat_events(show_id, available_seats)
+    else:
+        events = _sync_seat_events(show_id, available_seats)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response